@@ -262,8 +262,9 @@ def add(**kwargs) -> int:
             else:
                 final_file_paths.append(path)
 
+        repo.update_index_many(final_file_paths)
+
         for path in final_file_paths:
-            repo.update_index(path)
             # Normalize path for display (relative to working dir if possible)
             try:
                 display_path = path.resolve().relative_to(repo.working_dir)
@@ -1,5 +1,7 @@
 """Constants used throughout libcaf."""
 
+import os
+
 from _libcaf import hash_length
 
 DEFAULT_REPO_DIR = '.caf'
@@ -10,6 +12,16 @@ DEFAULT_BRANCH = 'main'
 REFS_DIR = 'refs'
 HEADS_DIR = 'heads'
 TAGS_DIR = 'tags' 
+OBJECT_CACHE_SIZE = 1024
+# Number of file hashes Repository.save_file_content remembers by stat signature
+FILE_HASH_CACHE_SIZE = 4096
+# Minimum age of the index file, or of a saved file, before its parsed contents or hash are cached by stat;
+# covers coarse (up to 2 s) mtimes
+INDEX_CACHE_MIN_AGE_NS = 2_000_000_000
+# The index journal is folded into the index once it is larger than both the index and this size
+INDEX_JOURNAL_COMPACT_MIN_BYTES = 64 * 1024
+# Upper bound on the threads that hash and store files concurrently during a batched index update
+INDEX_HASH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 HASH_LENGTH = hash_length()
 HASH_CHARSET = '0123456789abcdef'
@@ -1,26 +1,32 @@
 """Index management functions for libcaf."""
 
 import contextlib
+import mmap
 import os
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from collections.abc import Callable, Iterable, Mapping
 from typing import IO, Iterator
 
 from . import Tree, TreeRecord, TreeRecordType
-from .plumbing import hash_object, save_file_content, save_tree
+from .constants import INDEX_HASH_WORKERS, INDEX_JOURNAL_COMPACT_MIN_BYTES
+from .plumbing import save_file_content, save_tree
 
+# Hash recorded in the index journal for a removed path; it can never be a real hash
+_REMOVED = '-'
+# Bytes read at a time while looking back for the last complete journal record
+_JOURNAL_TAIL_BLOCK = 4096
 
-@contextlib.contextmanager
-def index_lock_file(index_path: Path) -> Iterator[IO[str]]:
-    """Context manager for locking the index file using busy-wait exclusive creation.
 
-    :param index_path: The path to the index file to lock.
-    :yield: A text file object open for writing the index.lock file.
+def _acquire_lock(lock_path: Path) -> IO[str]:
+    """Create a lock file exclusively, busy-waiting while another writer holds it.
+
+    :param lock_path: The path of the lock file.
+    :return: The lock file, open for writing.
     :raises TimeoutError: If the lock file cannot be created after repeated attempts.
     """
-    lock_path = index_path.with_suffix('.lock')
-
     # Ensure the repository directory exists
     lock_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -32,8 +38,7 @@ def index_lock_file(index_path: Path) -> Iterator[IO[str]]:
     while True:
         try:
             # Try to create the lock file exclusively
-            lock_file = open(lock_path, 'x', encoding='utf-8')
-            break
+            return open(lock_path, 'x', encoding='utf-8')
         except FileExistsError:
             # 1. Check for timeout
             elapsed = time.monotonic() - start_monotonic
@@ -43,64 +48,191 @@ def index_lock_file(index_path: Path) -> Iterator[IO[str]]:
             # 2. Sleep
             time.sleep(sleep_time)
 
+
+@contextlib.contextmanager
+def _index_write_lock(index_path: Path) -> Iterator[None]:
+    """Hold the index lock while the index files are written.
+
+    :param index_path: The path to the index file to lock.
+    :raises TimeoutError: If the lock file cannot be created after repeated attempts.
+    """
+    lock_path = index_path.with_suffix('.lock')
+    _acquire_lock(lock_path).close()
+
     try:
-        yield lock_file
-    except Exception:
-        # On any exception, remove the lock file and re-raise
-        lock_file.close()
-        if lock_path.exists():
-            lock_path.unlink()
-        raise
-    else:
-        # On successful exit, close the file and atomically rename
-        lock_file.close()
-        os.replace(lock_path, index_path)
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def index_journal_path(index_path: Path) -> Path:
+    """Return the path of the journal that holds index updates not yet folded into the index file.
+
+    :param index_path: Path to the index file.
+    :return: The path of the index journal.
+    """
+    return index_path.with_suffix('.log')
 
 
 def merge_index(target_path: str, new_hash: str | None, index_path: Path) -> None:
-    """Merge a single entry into the index using a streaming zipper pattern.
+    """Merge a single entry into the index.
 
     :param target_path: The repository-relative path to update in the index.
     :param new_hash: The hash to write for the path, or None to delete the entry.
     :param index_path: Path to the index file.
     """
-    with index_lock_file(index_path) as lock_file:
-        # Case 1: Index doesn't exist yet. Simply create it with the new entry.
-        if not index_path.exists():
+    merge_index_many({target_path: new_hash}, index_path)
+
+
+def merge_index_many(updates: Mapping[str, str | None], index_path: Path) -> None:
+    """Record several index updates at once by appending them to the index journal.
+
+    Appending costs the size of the updates rather than of the whole index. Once the journal
+    grows larger than the index file (and INDEX_JOURNAL_COMPACT_MIN_BYTES), it is folded into
+    the index file, which is then rewritten once.
+
+    :param updates: A mapping from repository-relative paths to the hash to write for them,
+        or None to delete the entry.
+    :param index_path: Path to the index file.
+    """
+    if not updates:
+        return
+
+    journal_path = index_journal_path(index_path)
+    records = ''.join(f'{path} {_REMOVED if new_hash is None else new_hash}\n'
+                      for path, new_hash in sorted(updates.items()))
+
+    with _index_write_lock(index_path):
+        with open(journal_path, 'a+b') as journal:
+            _drop_torn_record(journal)
+            journal.write(records.encode('utf-8'))
+
+        index_size = index_path.stat().st_size if index_path.exists() else 0
+        if journal_path.stat().st_size > max(index_size, INDEX_JOURNAL_COMPACT_MIN_BYTES):
+            _compact_index(index_path, journal_path)
+
+
+def _drop_torn_record(journal: IO[bytes]) -> None:
+    """Truncate the journal after its last complete record. The caller must hold the index lock.
+
+    An append interrupted by a crash can leave a record without its newline. Readers skip it, but the
+    next append would otherwise continue on the same line and turn both into one bogus record.
+
+    :param journal: The index journal, open for binary reading and appending.
+    """
+    size = journal.seek(0, os.SEEK_END)
+    end = size
+    while end > 0:
+        start = max(0, end - _JOURNAL_TAIL_BLOCK)
+        journal.seek(start)
+        newline = journal.read(end - start).rfind(b'\n')
+        if newline != -1:
+            end = start + newline + 1
+            break
+        end = start
+
+    if end < size:
+        journal.truncate(end)
+
+
+def compact_index(index_path: Path) -> None:
+    """Fold the index journal into the index file.
+
+    :param index_path: Path to the index file.
+    """
+    with _index_write_lock(index_path):
+        _compact_index(index_path, index_journal_path(index_path))
+
+
+def _compact_index(index_path: Path, journal_path: Path) -> None:
+    """Fold the index journal into the index file. The caller must hold the index lock.
+
+    The new index is written next to the old one and renamed over it before the journal is
+    removed; should that removal not happen, replaying the journal again is harmless, since
+    its records set or remove entries rather than modify them.
+
+    :param index_path: Path to the index file.
+    :param journal_path: Path to the index journal.
+    """
+    if not journal_path.exists():
+        return
+
+    pending = sorted(_read_journal(journal_path).items())
+    new_index_path = index_path.with_suffix('.new')
+    with open(new_index_path, 'w', encoding='utf-8') as new_index:
+        _write_merged_index(new_index, pending, index_path)
+
+    os.replace(new_index_path, index_path)
+    journal_path.unlink()
+
+
+def _write_merged_index(out: IO[str], pending: list[tuple[str, str | None]], index_path: Path) -> None:
+    """Write the index file merged with sorted updates, using a streaming zipper pattern.
+
+    :param out: The file to write the merged index to.
+    :param pending: (path, hash) updates sorted by path; a None hash deletes the entry.
+    :param index_path: Path to the current index file.
+    """
+    # Case 1: Index doesn't exist yet. Simply create it with the new entries.
+    if not index_path.exists():
+        for target_path, new_hash in pending:
             if new_hash is not None:
-                lock_file.write(f'{target_path} {new_hash}\n')
-            return
-
-        # Case 2: Index exists. Stream and merge.
-        inserted = False
-        with open(index_path, 'r', encoding='utf-8') as old_index:
-            for line in old_index:
-                line = line.rstrip('\n\r')
-                if not line:
-                    continue
-
-                parts = line.rsplit(' ', 1)
-                if len(parts) != 2:
-                    warnings.warn(f"Skipping malformed index line: {line!r}", RuntimeWarning)
-                    continue
-
-                current_path, current_hash = parts
-
-                if current_path < target_path:
-                    lock_file.write(f'{current_path} {current_hash}\n')
-                elif current_path == target_path:
-                    if new_hash is not None:
-                        lock_file.write(f'{target_path} {new_hash}\n')
-                    inserted = True
-                else:
-                    if not inserted and new_hash is not None:
-                        lock_file.write(f'{target_path} {new_hash}\n')
-                        inserted = True
-                    lock_file.write(f'{current_path} {current_hash}\n')
-
-        # Case 3: We reached the end of the file and the new entry is last alphabetically
-        if not inserted and new_hash is not None:
-            lock_file.write(f'{target_path} {new_hash}\n')
+                out.write(f'{target_path} {new_hash}\n')
+        return
+
+    # Case 2: Index exists. Stream and merge.
+    next_update = 0
+    with open(index_path, 'r', encoding='utf-8') as old_index:
+        for line in old_index:
+            line = line.rstrip('\n\r')
+            if not line:
+                continue
+
+            parts = line.rsplit(' ', 1)
+            if len(parts) != 2:
+                warnings.warn(f"Skipping malformed index line: {line!r}", RuntimeWarning)
+                continue
+
+            current_path, current_hash = parts
+
+            # Write every update that sorts before the current entry
+            while next_update < len(pending) and pending[next_update][0] < current_path:
+                target_path, new_hash = pending[next_update]
+                if new_hash is not None:
+                    out.write(f'{target_path} {new_hash}\n')
+                next_update += 1
+
+            if next_update < len(pending) and pending[next_update][0] == current_path:
+                new_hash = pending[next_update][1]
+                if new_hash is not None:
+                    out.write(f'{current_path} {new_hash}\n')
+                next_update += 1
+            else:
+                out.write(f'{current_path} {current_hash}\n')
+
+    # Case 3: We reached the end of the file and the remaining entries are last alphabetically
+    for target_path, new_hash in pending[next_update:]:
+        if new_hash is not None:
+            out.write(f'{target_path} {new_hash}\n')
+
+
+def _read_journal(journal_path: Path) -> dict[str, str | None]:
+    """Read the index journal and fold its records into one update per path.
+
+    :param journal_path: Path to the index journal.
+    :return: A mapping from paths to their latest hash, or None if the latest record removed them.
+    """
+    with open(journal_path, 'r', encoding='utf-8', newline='') as journal:
+        content = journal.read()
+
+    updates: dict[str, str | None] = {}
+    # Records are PATH HASH lines like the index, with HASH '-' for removals. A record is only complete
+    # once its newline is written, so the text after the last newline is dropped.
+    for line in content.split('\n')[:-1]:
+        path, separator, hash_ = line.rstrip('\r').rpartition(' ')
+        if separator:
+            updates[path] = None if hash_ == _REMOVED else hash_
+    return updates
 
 
 def normalize_path(path: str | Path, working_dir: Path) -> str:
@@ -111,11 +243,22 @@ def normalize_path(path: str | Path, working_dir: Path) -> str:
     :return: A normalized repository-relative path string with forward slashes.
     :raises ValueError: If the path is not within the working directory.
     """
-    # Resolve converts relative paths to absolute and cleans up ".." or symlinks
+    return _relative_to_working_dir(path, Path(os.path.abspath(working_dir)))
+
+
+def _relative_to_working_dir(path: str | Path, working_dir: Path) -> str:
+    """Normalize a path against a working directory that is already absolute and normalized.
+
+    Split out of normalize_path so that batch callers normalize the working directory once
+    instead of once per path.
+
+    :param path: The file path to normalize. Can be absolute or relative.
+    :param working_dir: The absolute, normalized repository working directory.
+    :return: A normalized repository-relative path string with forward slashes.
+    :raises ValueError: If the path is not within the working directory.
+    """
+    # abspath converts relative paths to absolute and cleans up ".." without touching the filesystem
     path_obj = Path(path)
-    
-    # Ensure working_dir is absolute
-    working_dir = Path(os.path.abspath(working_dir))
 
     # FIX: If path is relative, anchor it to the repo's working directory
     if not path_obj.is_absolute():
@@ -131,9 +274,38 @@ def normalize_path(path: str | Path, working_dir: Path) -> str:
         raise ValueError(msg)
 
     # Convert to a repository-relative string with forward slashes for cross-platform compatibility
-    normalized_path = repo_relative_path.as_posix()
+    return repo_relative_path.as_posix()
+
 
-    return normalized_path
+def index_entry_path(path: Path | str, working_dir: Path, repo_dir_name: str) -> str:
+    """Get the index key of a path, rejecting paths inside the repository directory.
+
+    :param path: The file path. Can be absolute or relative to the working directory.
+    :param working_dir: The repository working directory.
+    :param repo_dir_name: The name of the repository directory (e.g. .caf).
+    :return: The repository-relative path used as the index key.
+    :raises ValueError: If the path is outside the working directory or inside the repository directory.
+    """
+    return _index_entry_path(path, Path(os.path.abspath(working_dir)), repo_dir_name)
+
+
+def _index_entry_path(path: Path | str, working_dir: Path, repo_dir_name: str) -> str:
+    """Normalize a path for the index, rejecting paths inside the repository directory.
+
+    :param path: The file path to normalize.
+    :param working_dir: The absolute, normalized repository working directory.
+    :param repo_dir_name: The name of the repository directory (e.g. .caf).
+    :return: The repository-relative path used as the index key.
+    :raises ValueError: If the path is inside the repository directory.
+    """
+    rel_path = _relative_to_working_dir(path, working_dir)
+
+    repo_dir_name_cf = repo_dir_name.casefold()
+    if any(part.casefold() == repo_dir_name_cf for part in rel_path.split('/')):
+        msg = f'Cannot index files inside repository directory: {rel_path}'
+        raise ValueError(msg)
+
+    return rel_path
 
 
 def update_index(path: Path | str, index_path: Path, working_dir: Path, repo_dir_name: str, objects_dir: Path | None = None, remove: bool = False) -> None:
@@ -151,57 +323,195 @@ def update_index(path: Path | str, index_path: Path, working_dir: Path, repo_dir
     :param remove: If True, remove the file from the index.
     :raises ValueError: If the path is inside the repository directory.
     """
-    rel_path = normalize_path(path, working_dir)
+    update_index_many([path], index_path, working_dir, repo_dir_name, objects_dir, remove)
 
-    rel_parts = Path(rel_path).parts
-    repo_dir_name_cf = repo_dir_name.casefold()
-    if any(part.casefold() == repo_dir_name_cf for part in rel_parts):
-        msg = f'Cannot index files inside repository directory: {rel_path}'
-        raise ValueError(msg)
 
+def update_index_many(paths: Iterable[Path | str], index_path: Path, working_dir: Path, repo_dir_name: str,
+                      objects_dir: Path | None = None, remove: bool = False,
+                      current_index: Mapping[str, str] | None = None) -> bool:
+    """Update the index with several file paths, recording all of them in a single index write.
+
+    Behaves like calling update_index for every path, but all paths are validated and
+    their blobs saved before the index is locked and the updates are recorded at once.
+
+    :param paths: The file paths to add, update or remove in the index.
+    :param index_path: Path to the index file.
+    :param working_dir: The repository working directory.
+    :param repo_dir_name: The name of the repository directory (e.g. .caf).
+    :param objects_dir: The path to the objects directory. Required if remove is False.
+    :param remove: If True, remove the files from the index.
+    :param current_index: Optional entries currently in the index. Paths already recorded in it with the
+        same hash are not written again, and nothing is written if no entry changes.
+    :return: True if the index was written, False if there was nothing to record.
+    :raises ValueError: If any path is inside the repository directory.
+    """
+    abs_working_dir = Path(os.path.abspath(working_dir))
+    rel_paths = [_index_entry_path(path, abs_working_dir, repo_dir_name) for path in paths]
+    if not rel_paths:
+        return False
+
+    updates: dict[str, str | None]
     if remove:
-        merge_index(rel_path, None, index_path=index_path)
+        updates = dict.fromkeys(rel_paths)
     else:
         if objects_dir is None:
             raise ValueError("objects_dir is required when adding to index")
-        
-        full_path = working_dir / rel_path
-        blob = save_file_content(objects_dir, full_path)
-        merge_index(rel_path, blob.hash, index_path=index_path)
+
+        file_paths = [working_dir / rel_path for rel_path in rel_paths]
+        if len(file_paths) == 1:
+            blobs = [save_file_content(objects_dir, file_paths[0])]
+        else:
+            # save_file_content releases the GIL while it hashes and copies, so files are stored concurrently
+            with ThreadPoolExecutor(max_workers=min(INDEX_HASH_WORKERS, len(file_paths))) as executor:
+                blobs = list(executor.map(lambda file_path: save_file_content(objects_dir, file_path), file_paths))
+        updates = {rel_path: blob.hash for rel_path, blob in zip(rel_paths, blobs)}
+
+    if current_index is not None:
+        updates = {rel_path: blob_hash for rel_path, blob_hash in updates.items()
+                   if current_index.get(rel_path) != blob_hash}
+        if not updates:
+            return False
+
+    merge_index_many(updates, index_path=index_path)
+    return True
 
 
 def read_index(index_path: Path) -> dict[str, str]:
     """Read the index file and return a dictionary of paths to hashes.
 
+    Updates still in the index journal are applied on top of the index file.
+
     :param index_path: Path to the index file.
     :return: A dictionary mapping file paths (repository-relative) to their
-        SHA-1 hashes. Returns an empty dictionary if the index file does not exist.
+        SHA-1 hashes, sorted by path. Returns an empty dictionary if neither the
+        index file nor the journal exists.
     """
-    index_dict: dict[str, str] = {}
-
-    # If index doesn't exist, return empty dict
-    if not index_path.exists():
+    index_dict, updates = _read_index_snapshot(index_path, _read_index_file, {})
+    if not updates:
         return index_dict
 
-    # Stream the index file line-by-line
-    with open(index_path, 'r', encoding='utf-8') as index_file:
-        for line in index_file:
-            # Parse the line: PATH HASH
-            line = line.rstrip('\n\r')
-            if not line:
-                # Skip empty lines
-                continue
+    for path, hash_ in updates.items():
+        if hash_ is None:
+            index_dict.pop(path, None)
+        else:
+            index_dict[path] = hash_
+    return dict(sorted(index_dict.items()))
 
-            # Split on last space to separate path from hash
-            parts = line.rsplit(' ', 1)
-            if len(parts) != 2:
-                # Skip malformed lines
-                continue
 
-            path, hash_ = parts
-            index_dict[path] = hash_
+def _read_index_snapshot[T](index_path: Path, read_index_file: Callable[[IO[bytes]], T],
+                            missing: T) -> tuple[T, dict[str, str | None]]:
+    """Read the index file and the journal as one consistent snapshot, without taking the index lock.
 
-    return index_dict
+    A compaction replaces the index file and then removes the journal, after which new updates start a
+    fresh journal. A journal read after the index file was replaced may therefore belong to the new index
+    file, and lack the records folded into it. The index file is kept open while the journal is read, so
+    its inode cannot be reused, and both are read again if the path no longer names that file.
+
+    :param index_path: Path to the index file.
+    :param read_index_file: Function reading what is needed from the open index file.
+    :param missing: The result to use in place of read_index_file's when the index file does not exist.
+    :return: The result for the index file, and the journal's updates as returned by _read_journal.
+    """
+    journal_path = index_journal_path(index_path)
+    while True:
+        try:
+            index_file = open(index_path, 'rb')
+        except FileNotFoundError:
+            index_file = None
+
+        with index_file if index_file is not None else contextlib.nullcontext():
+            result = read_index_file(index_file) if index_file is not None else missing
+            try:
+                updates = _read_journal(journal_path)
+            except FileNotFoundError:
+                updates = {}
+
+            try:
+                current = os.stat(index_path)
+            except FileNotFoundError:
+                current = None
+
+            if index_file is None:
+                unchanged = current is None
+            else:
+                opened = os.fstat(index_file.fileno())
+                unchanged = current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
+            if unchanged:
+                return result, updates
+
+
+def _read_index_file(index_file: IO[bytes]) -> dict[str, str]:
+    """Parse the index file alone, without the journal.
+
+    :param index_file: The index file, open for binary reading.
+    :return: A dictionary mapping file paths to hashes.
+    """
+    # An empty file cannot be mapped, and has no entries anyway
+    if os.fstat(index_file.fileno()).st_size == 0:
+        return {}
+
+    # Decode straight from the mapped pages instead of copying the file into a bytes object first,
+    # then parse all lines in one comprehension instead of streaming line by line
+    with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index_map:
+        content = str(index_map, 'utf-8')
+
+    # Each line is PATH HASH; split on the last space, since paths may contain spaces.
+    # Empty and malformed lines have no separator and are skipped.
+    entries = (line.rstrip('\r').rpartition(' ') for line in content.split('\n'))
+    return {path: hash_ for path, separator, hash_ in entries if separator}
+
+
+def lookup_index(index_path: Path, path: str) -> str | None:
+    """Look up the hash of a single index entry without parsing the whole index.
+
+    The sorted index file is searched by bisecting its mapped bytes, then the journal is checked for a later
+    update of the path.
+
+    :param index_path: Path to the index file.
+    :param path: The repository-relative path to look up, as used for index keys.
+    :return: The hash recorded for the path, or None if it is not in the index.
+    """
+    hash_, updates = _read_index_snapshot(index_path, lambda index_file: _lookup_index_file(index_file, path), None)
+    return updates[path] if path in updates else hash_
+
+
+def _lookup_index_file(index_file: IO[bytes], path: str) -> str | None:
+    """Find an entry in the index file alone, relying on its lines being sorted by path.
+
+    :param index_file: The index file, open for binary reading.
+    :param path: The repository-relative path to look up.
+    :return: The hash recorded in the index file for the path, or None if it has no entry for it.
+    """
+    if os.fstat(index_file.fileno()).st_size == 0:
+        return None
+
+    key = path.encode('utf-8')
+    with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index_map:
+        # Bisect over byte offsets: each probe reads the whole line around the midpoint, and UTF-8
+        # byte order matches the code point order the index is sorted in
+        low, high = 0, len(index_map)
+        while low < high:
+            probe = index_map.rfind(b'\n', 0, (low + high) // 2) + 1
+            # Empty and malformed lines are not entries and have no place in the sort order,
+            # so the probe moves on to the next entry line before comparing
+            start = probe
+            while True:
+                end = index_map.find(b'\n', start)
+                if end == -1:
+                    end = len(index_map)
+                line_path, separator, hash_ = index_map[start:end].rstrip(b'\r').rpartition(b' ')
+                if separator or end + 1 >= high:
+                    break
+                start = end + 1
+
+            if not separator or line_path > key:
+                # A match can only lie before the probed line
+                high = probe
+            elif line_path < key:
+                low = end + 1
+            else:
+                return hash_.decode('utf-8')
+    return None
 
 
 def build_tree_from_index(index: dict[str, str], objects_dir: Path) -> str:
@@ -215,23 +525,30 @@ def build_tree_from_index(index: dict[str, str], objects_dir: Path) -> str:
     # Represents the directory structure as nested dictionaries.
     # Leaves are strings (file hashes), nodes are dictionaries (subdirectories).
     root: dict[str, str | dict] = {}
-    
+
+    # Index keys are normalized, '/'-separated and mostly sorted, so files of one directory tend to arrive
+    # together; the node of the previous file's directory is reused instead of walking from the root again.
+    last_dir_path = ''
+    last_dir_node = root
     for path_str, file_hash in index.items():
-        parts = Path(path_str).parts
-        current = root
-        for part in parts[:-1]:
-            # Ensure we are navigating into a dictionary.
-            if part not in current:
-                current[part] = {}
-            # If an entry already exists and is a string, it represents a file, but
-            # we are now trying to treat it as a directory.
-            if isinstance(current[part], str):
-                msg = f"Conflict detected: '{part}' is both a file and a directory."
-                raise ValueError(msg)
-                
-            current = current[part]  # type: ignore
-        
-        current[parts[-1]] = file_hash
+        dir_path, _, name = path_str.rpartition('/')
+        if dir_path != last_dir_path:
+            current = root
+            for part in dir_path.split('/') if dir_path else ():
+                # Ensure we are navigating into a dictionary.
+                if part not in current:
+                    current[part] = {}
+                # If an entry already exists and is a string, it represents a file, but
+                # we are now trying to treat it as a directory.
+                if isinstance(current[part], str):
+                    msg = f"Conflict detected: '{part}' is both a file and a directory."
+                    raise ValueError(msg)
+
+                current = current[part]  # type: ignore
+            last_dir_path = dir_path
+            last_dir_node = current
+
+        last_dir_node[name] = file_hash
 
     return _build_tree_recursive(root, objects_dir)
 
@@ -255,7 +572,4 @@ def _build_tree_recursive(node: dict[str, str | dict], objects_dir: Path) -> str
             # File: Create a BLOB record
             tree_records[name] = TreeRecord(TreeRecordType.BLOB, value, name)
 
-    # Create Tree object
-    tree = Tree(tree_records)
-    save_tree(objects_dir, tree)
-    return hash_object(tree)
+    return save_tree(objects_dir, Tree(tree_records))
@@ -1,18 +1,22 @@
 """Merge functionality for libcaf."""
 
+import heapq
 import mmap
 import os
 import merge3
 from contextlib import ExitStack
-from collections.abc import Sequence, Iterator
+from itertools import accumulate, chain, count
+from collections.abc import Callable, Sequence, Iterator
 from pathlib import Path
-from typing import overload
+from typing import Any, overload
 
+from . import Commit
 from .plumbing import load_commit
 from .ref import HashRef
 
-class FileLineSequence(Sequence[str]):
-    """A lazy sequence of lines from a file on disk using mmap."""
+
+class FileLineSequence(Sequence[bytes]):
+    """A lazy sequence of the raw byte lines of a file on disk using mmap."""
     def __init__(self, path: Path):
         self.path = path
         self._offsets: list[int] = [0]
@@ -46,11 +50,13 @@ class FileLineSequence(Sequence[str]):
         if self._is_fully_scanned or not self._mm:
             return
 
+        if target_index == -1:
+            self._scan_to_end()
+            return
+
         # Target index 10 means we need 11 offsets (0..10)
-        # If target is -1 (infinity), loop until break
-        
         while not self._is_fully_scanned:
-            if target_index != -1 and len(self._offsets) > target_index + 1:
+            if len(self._offsets) > target_index + 1:
                 return
 
             pos = self._mm.find(b'\n', self._scanned_up_to)
@@ -67,6 +73,27 @@ class FileLineSequence(Sequence[str]):
             self._offsets.append(pos + 1)
             self._scanned_up_to = pos + 1
 
+    def _scan_to_end(self):
+        """Record the offsets of all remaining lines at once.
+
+        Splitting the unscanned tail and summing the line lengths both run in C, so a full scan
+        does not go through one find call per line.
+        """
+        start = self._scanned_up_to
+        lines = self._mm[start:].split(b'\n')
+        last_line = lines.pop()
+        # Each line takes its length plus the newline
+        ends = accumulate(map((1).__add__, map(len, lines)), initial=start)
+        next(ends)
+        self._offsets.extend(ends)
+        if last_line:
+            # Last line without newline
+            self._offsets.append(self._file_size)
+
+        self._len = len(self._offsets) - 1
+        self._scanned_up_to = self._file_size
+        self._is_fully_scanned = True
+
     def __enter__(self):
         return self
 
@@ -81,12 +108,12 @@ class FileLineSequence(Sequence[str]):
         return self._len
 
     @overload
-    def __getitem__(self, index: int) -> str: ...
+    def __getitem__(self, index: int) -> bytes: ...
     
     @overload
-    def __getitem__(self, index: slice) -> list[str]: ...
+    def __getitem__(self, index: slice) -> list[bytes]: ...
 
-    def __getitem__(self, index: int | slice) -> str | list[str]:
+    def __getitem__(self, index: int | slice) -> bytes | list[bytes]:
         if isinstance(index, slice):
              # Optimization for simple slices: [start:stop] or [:stop]
              # Avoid full scan if we only need the beginning.
@@ -135,70 +162,297 @@ class FileLineSequence(Sequence[str]):
         
         # Ensure open for read (should be open due to scan, but for safety)
         if self._mm:
-            line_bytes = self._mm[start_offset:end_offset]
-            return line_bytes.decode('utf-8', errors='replace')
-        return ""
+            return self._mm[start_offset:end_offset]
+        return b""
+
+class MyersSequenceMatcher:
+    """A drop-in for difflib.SequenceMatcher's get_matching_blocks() using Myers' O(ND) diff.
+
+    The work grows with the number of differences D rather than with len(a) * len(b), which keeps
+    merges of large, nearly identical files close to linear. It uses the linear-space refinement:
+    each range is split at its middle snake instead of keeping every step's frontier for a backtrack,
+    so memory stays O(N + M) however many differences there are."""
+
+    def __init__(self, isjunk: Callable[[Any], bool] | None = None, a: Sequence[Any] = (),
+                 b: Sequence[Any] = (), autojunk: bool = True) -> None:
+        # isjunk and autojunk are accepted for signature compatibility with difflib; Myers has no junk heuristic.
+        self.a = a
+        self.b = b
+
+    def get_matching_blocks(self) -> list[tuple[int, int, int]]:
+        """Return the matching blocks as (i, j, n) triples, ending with the (len(a), len(b), 0) sentinel."""
+        # Compare small integer ids instead of the lines themselves: equal lines share an id, so the
+        # snake loop does cheap int compares and each line is read from the underlying sequence only once.
+        ids: dict[Any, int] = {}
+        a = [ids.setdefault(line, len(ids)) for line in self.a]
+        b = [ids.setdefault(line, len(ids)) for line in self.b]
+
+        blocks: list[tuple[int, int, int]] = []
+        ranges = [(0, len(a), 0, len(b))]
+
+        while ranges:
+            a_lo, a_hi, b_lo, b_hi = ranges.pop()
+
+            # Common prefix and suffix of the range match as they are.
+            start = a_lo
+            while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+                a_lo += 1
+                b_lo += 1
+            if a_lo > start:
+                blocks.append((start, b_lo - (a_lo - start), a_lo - start))
+
+            end = a_hi
+            while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+                a_hi -= 1
+                b_hi -= 1
+            if a_hi < end:
+                blocks.append((a_hi, b_hi, end - a_hi))
+
+            # What is left is either a pure insertion/deletion, or gets split around its middle snake.
+            if a_lo == a_hi or b_lo == b_hi:
+                continue
+
+            x_start, y_start, x_end, y_end = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi)
+            if x_end > x_start:
+                blocks.append((x_start, y_start, x_end - x_start))
+            ranges.append((a_lo, x_start, b_lo, y_start))
+            ranges.append((x_end, a_hi, y_end, b_hi))
 
-def merge_content(base: Path, source: Path, other: Path, labels: tuple[str, str] = ('source', 'other')) -> Iterator[str]:
+        blocks.sort()
+        merged: list[tuple[int, int, int]] = []
+        for i, j, n in blocks:
+            if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+            else:
+                merged.append((i, j, n))
+
+        merged.append((len(a), len(b), 0))
+        return merged
+
+
+def _middle_snake(a: list[int], a_lo: int, a_hi: int, b: list[int], b_lo: int, b_hi: int) -> \
+        tuple[int, int, int, int]:
+    """Find the middle snake of an optimal edit path through a[a_lo:a_hi] and b[b_lo:b_hi].
+
+    Runs the greedy search forward from the start and backward from the end at the same time,
+    until the two frontiers overlap on a diagonal.
+
+    :return: The snake as absolute (x_start, y_start, x_end, y_end); it may be empty."""
+    n, m = a_hi - a_lo, b_hi - b_lo
+    delta = n - m
+    odd = delta % 2 == 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    # forward[k]: furthest x on diagonal k from the start;
+    # backward[k]: furthest x on diagonal k from the end, measured on the reversed sequences.
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[offset + delta - k] >= n:
+                return a_lo + x0, b_lo + y0, a_lo + x, b_lo + y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return a_hi - x, b_hi - y, a_hi - x0, b_hi - y0
+
+    msg = 'Myers diff found no middle snake'
+    raise AssertionError(msg)
+
+
+def merge_content(base: Path, source: Path, other: Path, labels: tuple[str, str] = ('source', 'other')) -> Iterator[bytes]:
     """Merge content from three file paths (3-way merge).
     
     :param base: Path to the common ancestor file.
     :param source: Path to the source file (e.g., HEAD).
     :param other: Path to the other file (e.g., merging branch).
     :param labels: Tuple of (source_label, other_label) for conflict markers.
-    :return: An iterator yielding the merged content line by line.
+    :return: An iterator yielding the merged content as raw bytes. Lines are never decoded.
     """
+    # Lines shared by all three versions are not trimmed before merging: such a line can still be the anchor
+    # that lines up the hunks of one side against the other. The matcher skips the prefix and suffix shared
+    # by each pair of versions instead.
     with ExitStack() as stack:
         seq_base = stack.enter_context(FileLineSequence(base))
         seq_source = stack.enter_context(FileLineSequence(source))
         seq_other = stack.enter_context(FileLineSequence(other))
 
-        m = merge3.Merge3(seq_base, seq_source, seq_other)
-        yield from m.merge_lines(name_a=labels[0], name_b=labels[1])
+        source_lines = seq_source[:]
+        # Like Merge3, take the newline style of the conflict markers from the first line of the source file
+        newline = b'\n'
+        if source_lines and source_lines[0].endswith(b'\r\n'):
+            newline = b'\r\n'
+        elif source_lines and source_lines[0].endswith(b'\r'):
+            newline = b'\r'
 
+        yield from _merge_lines(seq_base[:], source_lines, seq_other[:], labels, newline)
+
+
+def _merge_lines(base: list[bytes], source: list[bytes], other: list[bytes],
+                 labels: tuple[str, str], newline: bytes) -> Iterator[bytes]:
+    """Three-way merge lists of lines, with the same output and conflict markers as Merge3.merge_lines.
+
+    All three versions share one symbol table mapping each distinct line to a small integer, and Merge3 only
+    ever compares those ids; lines are looked up again just to produce the output.
+
+    :param base: Lines of the common ancestor.
+    :param source: Lines of the source version.
+    :param other: Lines of the other version.
+    :param labels: Tuple of (source_label, other_label) for conflict markers.
+    :param newline: The line ending of the conflict markers.
+    :return: An iterator yielding the merged lines and conflict markers.
+    """
+    symbols = {line: symbol for symbol, line in enumerate(dict.fromkeys(chain(base, source, other)))}
+    m = merge3.Merge3(list(map(symbols.__getitem__, base)),
+                      list(map(symbols.__getitem__, source)),
+                      list(map(symbols.__getitem__, other)),
+                      sequence_matcher=MyersSequenceMatcher)
+
+    for region in m.merge_regions():
+        match region:
+            case ('unchanged', start, end):
+                yield from base[start:end]
+            case ('a' | 'same', start, end):
+                yield from source[start:end]
+            case ('b', start, end):
+                yield from other[start:end]
+            case ('conflict', _, _, source_start, source_end, other_start, other_end):
+                yield b'<<<<<<< ' + labels[0].encode('utf-8') + newline
+                yield from source[source_start:source_end]
+                yield b'=======' + newline
+                yield from other[other_start:other_end]
+                yield b'>>>>>>> ' + labels[1].encode('utf-8') + newline
+            case _:
+                raise ValueError(region[0])
+
+
+def merge_content_str(base: Path, source: Path, other: Path, labels: tuple[str, str] = ('source', 'other')) -> str:
+    """Merge content from three file paths and return the result as text.
+
+    :param base: Path to the common ancestor file.
+    :param source: Path to the source file (e.g., HEAD).
+    :param other: Path to the other file (e.g., merging branch).
+    :param labels: Tuple of (source_label, other_label) for conflict markers.
+    :return: The merged content.
+    """
+    return b''.join(merge_content(base, source, other, labels)).decode('utf-8', errors='replace')
+
+
+# Flags marking which side of merge_base reached a commit, and whether it is already below a common ancestor
+_PARENT1 = 1
+_PARENT2 = 2
+_BOTH_PARENTS = _PARENT1 | _PARENT2
+_STALE = 4
+
+
+def merge_base(repo_objects_dir, commit_hash1: str, commit_hash2: str,
+               commit_loader: Callable[[str], Commit] | None = None) -> str | None:
+    """Find the best common ancestor of two commits.
+
+    Both histories are walked at once through all parents, newest commit first, as git's merge-base does.
+    Every commit records which sides have reached it; a commit reached from both sides is a common ancestor,
+    and its own ancestors are marked stale so the walk stops once only stale commits are left. Common
+    ancestors that are ancestors of another one are discarded, and the newest remaining one is returned.
 
-def merge_base(repo_objects_dir, commit_hash1: str, commit_hash2: str) -> str | None:
-    """Find the common ancestor of two commits using simultaneous traversal.
-    
-    This implementation restricts traversal to the first parent only and
-    traverses both histories simultaneously to improve performance.
-    
     :param repo_objects_dir: The path to the objects directory.
     :param commit_hash1: The hash of the first commit.
     :param commit_hash2: The hash of the second commit.
+    :param commit_loader: Optional function loading a commit by hash, e.g. a cached loader shared with other
+        queries. Defaults to reading the commit from repo_objects_dir.
     :return: The hash of the common ancestor or None if no common ancestor is found.
     """
-    visited = set()
-    
-    # Initialize cursors for both commits
-    curr1: str | None = commit_hash1
-    curr2: str | None = commit_hash2
-    
-    while curr1 is not None or curr2 is not None:
-        # Process commit 1
-        if curr1 is not None:
-            if curr1 in visited:
-                return curr1
-            visited.add(curr1)
-            
-            try:
-                commit1 = load_commit(repo_objects_dir, HashRef(curr1))
-                curr1 = commit1.parents[0] if commit1.parents else None
-            except Exception:
-                # If we can't load the commit (e.g. at the beginning of repo or error)
-                # just stop this branch
-                curr1 = None
-
-        # Process commit 2
-        if curr2 is not None:
-            if curr2 in visited:
-                return curr2
-            visited.add(curr2)
-            
+    if commit_hash1 == commit_hash2:
+        return commit_hash1
+
+    commits: dict[str, Commit | None] = {}
+
+    def load(commit_hash: str) -> Commit | None:
+        if commit_hash not in commits:
             try:
-                commit2 = load_commit(repo_objects_dir, HashRef(curr2))
-                curr2 = commit2.parents[0] if commit2.parents else None
+                if commit_loader is not None:
+                    commits[commit_hash] = commit_loader(commit_hash)
+                else:
+                    commits[commit_hash] = load_commit(repo_objects_dir, HashRef(commit_hash))
             except Exception:
-                curr2 = None
-                
-    return None
+                # If we can't load the commit just stop walking this branch
+                commits[commit_hash] = None
+        return commits[commit_hash]
+
+    def parents_of(commit_hash: str) -> list[str]:
+        commit = load(commit_hash)
+        return commit.parents if commit is not None else []
+
+    flags: dict[str, int] = {}
+    queue: list[tuple[int, int, str]] = []
+    order = count()
+
+    def push(commit_hash: str) -> None:
+        commit = load(commit_hash)
+        if commit is not None:
+            # Ties on the timestamp are popped in the order the commits were reached
+            heapq.heappush(queue, (-commit.timestamp, next(order), commit_hash))
+
+    flags[commit_hash1] = _PARENT1
+    flags[commit_hash2] = _PARENT2
+    push(commit_hash1)
+    push(commit_hash2)
+
+    candidates: list[str] = []
+    while any(not flags[queued] & _STALE for _, _, queued in queue):
+        _, _, commit_hash = heapq.heappop(queue)
+        commit_flags = flags[commit_hash]
+        if commit_flags & _BOTH_PARENTS == _BOTH_PARENTS:
+            if not commit_flags & _STALE:
+                candidates.append(commit_hash)
+            commit_flags |= _STALE
+            flags[commit_hash] = commit_flags
+
+        for parent in parents_of(commit_hash):
+            parent_flags = flags.get(parent, 0)
+            if parent_flags & commit_flags == commit_flags:
+                continue
+            flags[parent] = parent_flags | commit_flags
+            push(parent)
+
+    if len(candidates) <= 1:
+        return candidates[0] if candidates else None
+
+    # Commits with equal timestamps can be popped before their descendants, so a candidate may be an
+    # ancestor of another candidate. Drop those.
+    redundant: set[str] = set()
+    for candidate in candidates:
+        stack = list(parents_of(candidate))
+        seen: set[str] = set()
+        while stack:
+            ancestor = stack.pop()
+            if ancestor in seen:
+                continue
+            seen.add(ancestor)
+            if ancestor in candidates:
+                redundant.add(ancestor)
+            stack.extend(parents_of(ancestor))
+
+    return next(candidate for candidate in candidates if candidate not in redundant)
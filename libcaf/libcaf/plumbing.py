@@ -54,11 +54,11 @@ def save_file_content(root_dir: str | Path, file_path: str | Path) -> Blob:
     return _libcaf.save_file_content(root_dir, file_path)
 
 
-def save_commit(root_dir: str | Path, commit: Commit) -> None:
+def save_commit(root_dir: str | Path, commit: Commit) -> HashRef:
     if isinstance(root_dir, Path):
         root_dir = str(root_dir)
 
-    _libcaf.save_commit(root_dir, commit)
+    return HashRef(_libcaf.save_commit(root_dir, commit))
 
 
 def load_commit(root_dir: str | Path, commit_ref: HashRef) -> Commit:
@@ -68,11 +68,11 @@ def load_commit(root_dir: str | Path, commit_ref: HashRef) -> Commit:
     return _libcaf.load_commit(root_dir, commit_ref)
 
 
-def save_tree(root_dir: str | Path, tree: Tree) -> None:
+def save_tree(root_dir: str | Path, tree: Tree) -> HashRef:
     if isinstance(root_dir, Path):
         root_dir = str(root_dir)
 
-    _libcaf.save_tree(root_dir, tree)
+    return HashRef(_libcaf.save_tree(root_dir, tree))
 
 
 def load_tree(root_dir: str | Path, hash_value: str) -> Tree:
@@ -1,9 +1,13 @@
 """Reference objects and operations."""
 
+import os
+import re
 from pathlib import Path
 
 from .constants import HASH_CHARSET, HASH_LENGTH
 
+_HASH_PATTERN = re.compile(f'[{HASH_CHARSET}]{{{HASH_LENGTH}}}')
+
 
 class RefError(Exception):
     """Exception raised for reference-related errors."""
@@ -28,6 +32,14 @@ class SymRef(str):
 Ref = HashRef | SymRef | str
 
 
+def is_hash(value: str) -> bool:
+    """Check whether a string is a full object hash.
+
+    :param value: The string to check
+    :return: True if the string consists of exactly HASH_LENGTH lowercase hex digits"""
+    return _HASH_PATTERN.fullmatch(value) is not None
+
+
 def read_ref(ref_file: Path) -> Ref | None:
     """Read a reference from a file.
 
@@ -43,7 +55,7 @@ def read_ref(ref_file: Path) -> Ref | None:
         if not content:
             return None
 
-        if len(content) == HASH_LENGTH and all(c in HASH_CHARSET for c in content):
+        if is_hash(content):
             return HashRef(content)
 
         msg = f'Invalid reference format in ref file {ref_file}!'
@@ -56,12 +68,18 @@ def write_ref(ref_file: Path, ref: Ref) -> None:
     :param ref_file: Path to the reference file
     :param ref: Reference to write (HashRef or SymRef)
     :raises RefError: If the reference type is invalid"""
-    with ref_file.open('w') as f:
-        match ref:
-            case HashRef():
-                f.write(ref)
-            case SymRef(ref):
-                f.write(f'ref: {ref}')
-            case _:
-                msg = f'Invalid reference type: {type(ref)}'
-                raise RefError(msg)
+    match ref:
+        case HashRef():
+            content = ref
+        case SymRef(ref):
+            content = f'ref: {ref}'
+        case _:
+            msg = f'Invalid reference type: {type(ref)}'
+            raise RefError(msg)
+
+    # Refs are tiny, so write them with a single unbuffered write instead of a text stream
+    fd = os.open(ref_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content.encode('utf-8'))
+    finally:
+        os.close(fd)
@@ -2,21 +2,21 @@
 
 import os
 import shutil
-from collections import deque
-from collections.abc import Callable, Generator, Iterator, Sequence
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
 from dataclasses import dataclass
-from datetime import datetime
-from functools import wraps, partial
+from functools import lru_cache, wraps
 from pathlib import Path
 from typing import Concatenate
 
 
 from . import Blob, Commit, Tree, TreeRecord, TreeRecordType
-from .constants import (DEFAULT_BRANCH, DEFAULT_REPO_DIR, HASH_CHARSET, HASH_LENGTH, HEADS_DIR, HEAD_FILE,
-                        INDEX_FILE, OBJECTS_SUBDIR, REFS_DIR, TAGS_DIR)
-from .plumbing import hash_file, hash_object, load_commit, load_tree, save_commit, save_file_content, save_tree
+from .constants import (DEFAULT_BRANCH, DEFAULT_REPO_DIR, FILE_HASH_CACHE_SIZE, HEADS_DIR, HEAD_FILE,
+                        INDEX_CACHE_MIN_AGE_NS, INDEX_FILE, OBJECT_CACHE_SIZE, OBJECTS_SUBDIR, REFS_DIR, TAGS_DIR)
+from .plumbing import hash_file, load_commit, load_tree, save_commit, save_file_content, save_tree
 from .diff import(build_tree_from_fs, diff_trees, AddedDiff, Diff, ModifiedDiff, MovedFromDiff, MovedToDiff, RemovedDiff)
-from .ref import HashRef, Ref, RefError, SymRef, read_ref, write_ref
+from .ref import HashRef, Ref, RefError, SymRef, is_hash, read_ref, write_ref
 from .checkout import CheckoutError, apply_checkout, create_tree
 from . import index
 from . import merge
@@ -44,11 +44,13 @@ class Repository:
     This class provides methods to initialize a repository, manage branches,
     commit changes, and perform various operations on the repository."""
 
-    def __init__(self, working_dir: Path | str, repo_dir: Path | str | None = None) -> None:
+    def __init__(self, working_dir: Path | str, repo_dir: Path | str | None = None,
+                 object_cache_size: int = OBJECT_CACHE_SIZE) -> None:
         """Initialize a Repository instance. The repository is not created on disk until `init()` is called.
 
         :param working_dir: The working directory where the repository will be located.
-        :param repo_dir: The name of the repository directory within the working directory. Defaults to '.caf'."""
+        :param repo_dir: The name of the repository directory within the working directory. Defaults to '.caf'.
+        :param object_cache_size: The number of decoded commits and trees to keep in memory. Defaults to 1024."""
         self.working_dir = Path(working_dir)
 
         if repo_dir is None:
@@ -56,6 +58,40 @@ class Repository:
         else:
             self.repo_dir = Path(repo_dir)
 
+        self.set_object_cache_size(object_cache_size)
+        self._index_tree: tuple[dict[str, str], str] | None = None
+        self._index_cache: tuple[tuple[tuple[int, int, int], ...], dict[str, str]] | None = None
+        # Least recently used first; stale signatures are never looked up again and age out
+        self._file_hash_cache: OrderedDict[tuple[int, int, int, int, int], str] = OrderedDict()
+
+    def set_object_cache_size(self, size: int) -> None:
+        """Set the number of decoded commits and trees kept in memory, dropping any cached objects.
+
+        Objects are addressed by the hash of their content, so a cached object can never go stale.
+
+        :param size: The maximum number of cached commits and of cached trees. 0 disables the cache."""
+        self._load_commit = lru_cache(maxsize=size)(self._read_commit)
+        self._load_tree = lru_cache(maxsize=size)(self._read_tree)
+
+    def _read_commit(self, commit_hash: str) -> Commit:
+        return load_commit(self.objects_dir(), HashRef(commit_hash))
+
+    def _read_tree(self, tree_hash: str) -> Tree:
+        return load_tree(self.objects_dir(), tree_hash)
+
+    def _tree_from_index(self, index_data: dict[str, str]) -> str:
+        # Committing an unchanged index (e.g. repeated commit_working_dir calls on the same content)
+        # would rebuild and rewrite every tree. Reuse the root tree of the previous build instead,
+        # as long as its object is still in the objects directory.
+        if self._index_tree is not None:
+            cached_index, tree_hash = self._index_tree
+            if cached_index == index_data and (self.objects_dir() / tree_hash[:2] / tree_hash).exists():
+                return tree_hash
+
+        tree_hash = index.build_tree_from_index(index_data, self.objects_dir())
+        self._index_tree = (index_data, tree_hash)
+        return tree_hash
+
     def init(self, default_branch: str = DEFAULT_BRANCH) -> None:
         """Initialize a new CAF repository in the working directory.
 
@@ -208,7 +244,7 @@ class Repository:
                     return self.resolve_ref(branch_ref(ref))
                 if self.tag_exists(SymRef(ref)):
                     return self.resolve_ref(tag_ref(ref))
-                if len(ref) == HASH_LENGTH and all(c in HASH_CHARSET for c in ref):
+                if is_hash(ref):
                     return HashRef(ref)
 
                 msg = f'Invalid reference: {ref}'
@@ -250,7 +286,29 @@ class Repository:
         :return: A Blob object representing the saved file content.
         :raises ValueError: If the file does not exist.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        return save_file_content(self.objects_dir(), file)
+        objects_dir = self.objects_dir()
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return save_file_content(objects_dir, file)
+
+        # A file whose identity, size and timestamps are unchanged still has the content saved for it,
+        # as long as that object was not deleted since
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+        file_hash = self._file_hash_cache.get(key)
+        if file_hash is not None and (objects_dir / file_hash[:2] / file_hash).exists():
+            self._file_hash_cache.move_to_end(key)
+            return Blob(file_hash)
+
+        blob = save_file_content(objects_dir, file)
+        # A write within the filesystem's timestamp granularity could keep the same stat key,
+        # so only remember files whose last change is safely in the past
+        if time.time_ns() - max(stat.st_mtime_ns, stat.st_ctime_ns) > INDEX_CACHE_MIN_AGE_NS:
+            self._file_hash_cache[key] = blob.hash
+            self._file_hash_cache.move_to_end(key)
+            if len(self._file_hash_cache) > FILE_HASH_CACHE_SIZE:
+                self._file_hash_cache.popitem(last=False)
+        return blob
     
     @requires_repo
     def create_tag(self, tag:str, commit: str) -> None:
@@ -426,9 +484,7 @@ class Repository:
                         stack.append(item)
                         break
             else:
-                tree = Tree(tree_records)
-                save_tree(self.objects_dir(), tree)
-                hashes[current_path] = hash_object(tree)
+                hashes[current_path] = save_tree(self.objects_dir(), Tree(tree_records))
 
         return HashRef(hashes[path])
 
@@ -461,12 +517,10 @@ class Repository:
 
         # Build tree from index
         index_data = self.read_index()
-        tree_hash = index.build_tree_from_index(index_data, self.objects_dir())
-
-        commit = Commit(tree_hash, author, message, int(datetime.now().timestamp()), parents)
-        commit_ref = HashRef(hash_object(commit))
+        tree_hash = self._tree_from_index(index_data)
 
-        save_commit(self.objects_dir(), commit)
+        commit = Commit(tree_hash, author, message, int(time.time()), parents)
+        commit_ref = save_commit(self.objects_dir(), commit)
 
         if branch:
             self.update_ref(branch, commit_ref)
@@ -484,6 +538,7 @@ class Repository:
         # 1. Recursively update index for all files in working dir
         repo_name = self.repo_dir.name
         fs_paths: set[str] = set()
+        file_paths: list[Path] = []
         
         for root, dirs, files in os.walk(self.working_dir):
             if repo_name in dirs:
@@ -491,17 +546,19 @@ class Repository:
             
             for file in files:
                 file_path = Path(root) / file
-                self.update_index(file_path)
+                file_paths.append(file_path)
                 
                 # Normalize path to match index keys logic (use forward slashes)
                 rel_path = file_path.relative_to(self.working_dir)
                 fs_paths.add(rel_path.as_posix())
 
+        self.update_index_many(file_paths)
+
         # 2. Remove files present in index but missing from FS
         index_data = self.read_index()
-        for indexed_path in index_data:
-            if indexed_path not in fs_paths:
-                self.remove_from_index(indexed_path)
+        missing_paths = [indexed_path for indexed_path in index_data if indexed_path not in fs_paths]
+        self._index_cache = None
+        index.update_index_many(missing_paths, self.index_path(), self.working_dir, self.repo_dir.name, remove=True)
 
         return self.commit(author, message)
 
@@ -518,7 +575,7 @@ class Repository:
 
         try:
             while current_hash:
-                commit = load_commit(self.objects_dir(), current_hash)
+                commit = self._load_commit(current_hash)
                 yield LogEntry(HashRef(current_hash), commit)
 
                 current_hash = HashRef(commit.parents[0]) if commit.parents else None
@@ -547,8 +604,8 @@ class Repository:
                         msg = f"Cannot resolve reference {spec}"
                         raise RepositoryError(msg)
 
-                    commit = load_commit(self.objects_dir(), commit_hash)
-                    tree = load_tree(self.objects_dir(), commit.tree_hash)
+                    commit = self._load_commit(commit_hash)
+                    tree = self._load_tree(commit.tree_hash)
                     return tree, commit.tree_hash, None
                 except Exception as e:
                     msg = f"Error resolving spec {spec}"
@@ -556,7 +613,7 @@ class Repository:
 
             case str():
                 # Strings: hash vs path vs ref
-                if len(spec) == HASH_LENGTH and all(c in HASH_CHARSET for c in spec):
+                if is_hash(spec):
                     return self._resolve_tree_spec(HashRef(spec))
 
                 path = Path(spec).expanduser().resolve(strict=False)
@@ -600,6 +657,12 @@ class Repository:
         :return: A sequence of Diff objects representing the changes.
         :raises RepositoryError: If either spec cannot be resolved or objects cannot be loaded."""
         tree1, hash1, lookup1 = self._resolve_tree_spec(spec1)
+
+        # Identical specs (e.g. the HEAD/HEAD default) name the same tree, so skip resolving the second one.
+        # The types must match as well: SymRef('x') == 'x', but the string 'x' may name a directory instead.
+        if type(spec1) is type(spec2) and spec1 == spec2:
+            return []
+
         tree2, hash2, lookup2 = self._resolve_tree_spec(spec2)
 
         if hash1 == hash2:
@@ -607,7 +670,7 @@ class Repository:
         
         def make_loader(lookup):
             if lookup is None:
-                return partial(load_tree, self.objects_dir())
+                return self._load_tree
 
             def _load_from_lookup(h: str) -> Tree:
                 try:
@@ -665,7 +728,7 @@ class Repository:
                 if any(item.name != self.repo_dir.name for item in self.working_dir.iterdir()):
                     raise CheckoutError("Working directory is not empty; aborting checkout.")
                 
-                commit = load_commit(self.objects_dir(), resolved_hash)
+                commit = self._load_commit(resolved_hash)
                 create_tree(self.objects_dir(), commit.tree_hash, self.working_dir)
                 
         except(RuntimeError, OSError) as e:
@@ -701,7 +764,26 @@ class Repository:
         :raises ValueError: If the path is inside the repository directory (.caf).
         :raises RepositoryNotFoundError: If the repository does not exist.
         """
-        index.update_index(path, self.index_path(), self.working_dir, self.repo_dir.name, self.objects_dir())
+        # Entries already recorded with the same hash are skipped; a settled index is known without parsing it
+        current_index = self._cached_index_entries()
+        if index.update_index_many([path], self.index_path(), self.working_dir, self.repo_dir.name, self.objects_dir(),
+                                   current_index=current_index):
+            self._index_cache = None
+
+    @requires_repo
+    def update_index_many(self, paths: Iterable[Path | str]) -> None:
+        """Update the index with several file paths, recording all of them in a single index write.
+
+        :param paths: The file paths to add or update in the index. Each can be absolute
+            or relative to the working directory.
+        :raises ValueError: If any path is inside the repository directory (.caf).
+        :raises RepositoryNotFoundError: If the repository does not exist.
+        """
+        # Entries already recorded with the same hash are skipped; a settled index is known without parsing it
+        current_index = self._cached_index_entries()
+        if index.update_index_many(paths, self.index_path(), self.working_dir, self.repo_dir.name, self.objects_dir(),
+                                   current_index=current_index):
+            self._index_cache = None
 
     @requires_repo
     def remove_from_index(self, path: Path | str) -> None:
@@ -712,24 +794,76 @@ class Repository:
         :raises ValueError: If the path is inside the repository directory (.caf).
         :raises RepositoryNotFoundError: If the repository does not exist.
         """
-        index.update_index(path, self.index_path(), self.working_dir, self.repo_dir.name, remove=True)
+        rel_path = index.index_entry_path(path, self.working_dir, self.repo_dir.name)
+        # Membership is answered by the stat-cached index, or else by a single-entry lookup, so removing
+        # a path that was never indexed leaves the index and its journal untouched without parsing them
+        current_index = self._cached_index_entries()
+        if current_index is not None:
+            indexed = rel_path in current_index
+        else:
+            indexed = index.lookup_index(self.index_path(), rel_path) is not None
+        if not indexed:
+            return
+
+        self._index_cache = None
+        index.update_index(rel_path, self.index_path(), self.working_dir, self.repo_dir.name, remove=True)
 
     @requires_repo
     def read_index(self) -> dict[str, str]:
         """Read the index file and return a dictionary of paths to hashes.
 
-        This method reads the index file line-by-line and parses each entry.
         The index file format is: PATH HASH (one entry per line, sorted alphabetically).
+        The index file is memory-mapped and parsed in one pass, then the updates still in
+        the index journal (same format, HASH '-' for a removal) are replayed on top of it.
+        The parsed entries are kept in memory and reused while the inode, size and
+        modification time of the index file and its journal stay the same.
 
         :return: A dictionary mapping file paths (repository-relative) to their
-            SHA-1 hashes. Returns an empty dictionary if the index file does not exist.
+            SHA-1 hashes. Returns an empty dictionary if neither the index file nor
+            the journal exists.
         :raises RepositoryNotFoundError: If the repository does not exist.
         """
-        return index.read_index(self.index_path())
+        index_path = self.index_path()
+        stats = self._index_stats()
+        key = tuple((stat.st_ino, stat.st_size, stat.st_mtime_ns) for stat in stats)
+        if self._index_cache is not None and self._index_cache[0] == key:
+            return dict(self._index_cache[1])
+
+        index_data = index.read_index(index_path)
+        # A rewrite within the filesystem's timestamp granularity could keep the same stat key,
+        # so only cache an index whose last write is safely in the past
+        if stats and all(time.time_ns() - stat.st_mtime_ns > INDEX_CACHE_MIN_AGE_NS for stat in stats):
+            self._index_cache = (key, dict(index_data))
+        return index_data
+
+    def _index_stats(self) -> list[os.stat_result]:
+        """Stat the index file and its journal, skipping whichever does not exist.
+
+        :return: The stat results of the existing index files."""
+        index_path = self.index_path()
+        stats = []
+        for path in (index_path, index.index_journal_path(index_path)):
+            try:
+                stats.append(os.stat(path))
+            except FileNotFoundError:
+                pass
+        return stats
+
+    def _cached_index_entries(self) -> dict[str, str] | None:
+        """Get the parsed index entries kept by read_index, if they are still current.
+
+        Unlike read_index this never parses the index files.
+
+        :return: The cached entries, or None if nothing current is cached."""
+        if self._index_cache is None:
+            return None
+
+        key = tuple((stat.st_ino, stat.st_size, stat.st_mtime_ns) for stat in self._index_stats())
+        return self._index_cache[1] if self._index_cache[0] == key else None
 
     @requires_repo
     def merge_base(self, commit_hash1: str, commit_hash2: str) -> str | None:
-        """Find the common ancestor of two commits using simultaneous traversal.
+        """Find the best common ancestor of two commits, walking both histories newest commit first.
         
         :param commit_hash1: The hash of the first commit.
         :param commit_hash2: The hash of the second commit.
@@ -737,19 +871,19 @@ class Repository:
         """
         # Validate inputs first (Wrapper logic)
         try:
-            load_commit(self.objects_dir(), HashRef(commit_hash1))
+            self._load_commit(commit_hash1)
         except Exception as e:
             msg = f"Commit {commit_hash1} not found or invalid"
             raise RepositoryError(msg) from e
             
         try:
-            load_commit(self.objects_dir(), HashRef(commit_hash2))
+            self._load_commit(commit_hash2)
         except Exception as e:
             msg = f"Commit {commit_hash2} not found or invalid"
             raise RepositoryError(msg) from e
 
         # Delegated to the merge module (Pure logic)
-        return merge.merge_base(self.objects_dir(), commit_hash1, commit_hash2)
+        return merge.merge_base(self.objects_dir(), commit_hash1, commit_hash2, self._load_commit)
 
 
 
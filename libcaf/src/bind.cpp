@@ -9,10 +9,11 @@ namespace py = pybind11;
 
 PYBIND11_MODULE(_libcaf, m) {
     // caf
-    m.def("hash_file", hash_file);
+    // File hashing and copying touch no Python objects, so other threads may run meanwhile
+    m.def("hash_file", hash_file, py::call_guard<py::gil_scoped_release>());
     m.def("hash_string", hash_string);
     m.def("hash_length", hash_length);
-    m.def("save_file_content", save_file_content);
+    m.def("save_file_content", save_file_content, py::call_guard<py::gil_scoped_release>());
     m.def("open_content_for_writing", open_content_for_writing);
     m.def("delete_content", delete_content);
     m.def("open_content_for_reading", open_content_for_reading);
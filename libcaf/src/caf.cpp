@@ -6,21 +6,24 @@
 #include <sys/stat.h>
 #include <fcntl.h>
 #include <sys/file.h>
+#include <sys/mman.h>
+#include <unistd.h>
 #include <openssl/evp.h>
 #include <tuple>
 #include <iostream>
 #include <fstream>
 #include <filesystem>
 #include <memory>
-#include <iomanip>
-#include <sstream>
 #include <vector>
 #include <chrono>
 #include <thread>
 
 #include "caf.h"
 
-constexpr size_t BUFFER_SIZE = 4096;
+// Large enough that hashing and copying a file take few read calls and few digest updates
+constexpr size_t BUFFER_SIZE = 64 * 1024;
+// Files at least this large are hashed through mmap instead of the read buffer
+constexpr size_t MMAP_THRESHOLD = 1024 * 1024;
 constexpr size_t DIR_NAME_SIZE = 2;
 
 std::string create_sub_dir(const std::string& content_root_dir, const std::string& hash);
@@ -28,6 +31,18 @@ void lock_file_with_timeout(int fd, int operation, int timeout_sec);
 void copy_file(const std::string& src, const std::string& dest);
 void create_content_path(const std::string& content_root_dir, const std::string& hash, std::string& output_path);
 
+// Lowercase hex encoding of a digest, written straight into the result without stream formatting
+static std::string to_hex(const unsigned char* data, unsigned int length) {
+    static constexpr char HEX_DIGITS[] = "0123456789abcdef";
+
+    std::string hex(length * 2, '\0');
+    for (unsigned int i = 0; i < length; ++i) {
+        hex[2 * i] = HEX_DIGITS[data[i] >> 4];
+        hex[2 * i + 1] = HEX_DIGITS[data[i] & 0x0f];
+    }
+    return hex;
+}
+
 std::string hash_file(const std::string& filename) {
     unsigned char hash[EVP_MAX_MD_SIZE];
     unsigned int hash_len;
@@ -42,26 +57,51 @@ std::string hash_file(const std::string& filename) {
         throw std::runtime_error("Failed to initialize digest");
     }
 
-    std::ifstream file(filename, std::ios::binary);
-    if (!file){
+    int fd = open(filename.c_str(), O_RDONLY);
+    if (fd < 0){
         EVP_MD_CTX_free(mdctx);
         throw std::runtime_error("Failed to open file");
     }
 
-    std::vector<char> buffer(BUFFER_SIZE);
-    while (file.read(buffer.data(), BUFFER_SIZE)) {
-        if (EVP_DigestUpdate(mdctx, buffer.data(), BUFFER_SIZE) != 1){
-            EVP_MD_CTX_free(mdctx);
-            throw std::runtime_error("Failed to update digest");
-        }
+    struct stat st;
+    if (fstat(fd, &st) != 0){
+        close(fd);
+        EVP_MD_CTX_free(mdctx);
+        throw std::runtime_error("Failed to stat file");
     }
 
-    // Handle the last partial read
-    if (file.gcount() > 0) {
-        if (EVP_DigestUpdate(mdctx, buffer.data(), file.gcount()) != 1){
+    bool updated = true;
+    if (S_ISREG(st.st_mode) && static_cast<size_t>(st.st_size) >= MMAP_THRESHOLD) {
+        // Large files are digested straight from the page cache in one update, without copying them
+        // through a read buffer first
+        void* data = mmap(nullptr, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+        if (data == MAP_FAILED){
+            close(fd);
             EVP_MD_CTX_free(mdctx);
-            throw std::runtime_error("Failed to update digest");
+            throw std::runtime_error("Failed to map file");
         }
+        madvise(data, st.st_size, MADV_SEQUENTIAL);
+        updated = EVP_DigestUpdate(mdctx, data, st.st_size) == 1;
+        munmap(data, st.st_size);
+    } else {
+        std::vector<char> buffer(BUFFER_SIZE);
+        ssize_t bytes_read;
+        while (updated && (bytes_read = read(fd, buffer.data(), BUFFER_SIZE)) != 0) {
+            if (bytes_read < 0) {
+                if (errno == EINTR)
+                    continue;
+                close(fd);
+                EVP_MD_CTX_free(mdctx);
+                throw std::runtime_error("Failed to read file");
+            }
+            updated = EVP_DigestUpdate(mdctx, buffer.data(), bytes_read) == 1;
+        }
+    }
+    close(fd);
+
+    if (!updated){
+        EVP_MD_CTX_free(mdctx);
+        throw std::runtime_error("Failed to update digest");
     }
 
     if (EVP_DigestFinal_ex(mdctx, hash, &hash_len) != 1){
@@ -71,13 +111,7 @@ std::string hash_file(const std::string& filename) {
 
     EVP_MD_CTX_free(mdctx);
 
-    std::ostringstream oss;
-    oss << std::hex << std::setfill('0');
-    for (unsigned int i = 0; i < hash_len; ++i) {
-        oss << std::setw(2) << static_cast<unsigned int>(hash[i]);
-    }
-
-    return oss.str();
+    return to_hex(hash, hash_len);
 }
 
 std::string hash_string(const std::string& content) {
@@ -109,13 +143,7 @@ std::string hash_string(const std::string& content) {
 
     EVP_MD_CTX_free(mdctx);
 
-    std::ostringstream oss;
-    oss << std::hex << std::setfill('0');
-    for (unsigned int i = 0; i < hash_len; ++i) {
-        oss << std::setw(2) << static_cast<unsigned int>(hash[i]);
-    }
-
-    return oss.str();
+    return to_hex(hash.data(), hash_len);
 }
 
 unsigned int hash_length() {
@@ -325,7 +353,7 @@ void lock_file_with_timeout(int fd, int operation, int timeout_sec){
             auto elapsed = std::chrono::steady_clock::now() - start_time;
             if (elapsed >= timeout_duration)
                 throw std::runtime_error("Failed to acquire lock");
-            std::this_thread::sleep_for(std::chrono::seconds(1));
+            std::this_thread::sleep_for(std::chrono::milliseconds(10));
         }
         else
             throw std::runtime_error("Failed to acquire lock");
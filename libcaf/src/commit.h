@@ -16,6 +16,9 @@ public:
 
     Commit(const std::string& tree_hash, const std::string& author, const std::string& message, std::time_t timestamp, const std::vector<std::string>& parents = {}):
             tree_hash(tree_hash), author(author), message(message), timestamp(timestamp), parents(parents) {}
+
+    // Hash memoized by hash_object; the fields above are const, so it can never go stale
+    mutable std::optional<std::string> cached_hash;
 };
 
 #endif // COMMIT_H
@@ -6,20 +6,28 @@ std::string hash_object(const Blob& blob) {
 }
 
 std::string hash_object(const Tree& tree) {
+    if (tree.cached_hash)
+        return *tree.cached_hash;
+
     std::string acc_std;
 
     for (const auto& [key, record] : tree.records) {
         acc_std += record.name + std::to_string(static_cast<int>(record.type)) + record.hash;
     }
 
-    return hash_string(acc_std);
+    tree.cached_hash = hash_string(acc_std);
+    return *tree.cached_hash;
 }
 
 std::string hash_object(const Commit& commit) {
+    if (commit.cached_hash)
+        return *commit.cached_hash;
+
     std::string parents_str;
     for (const auto& parent : commit.parents) {
         parents_str += parent;
     }
-    return hash_string(commit.tree_hash + commit.author + commit.message +
-                       std::to_string(commit.timestamp) + parents_str);
+    commit.cached_hash = hash_string(commit.tree_hash + commit.author + commit.message +
+                                     std::to_string(commit.timestamp) + parents_str);
+    return *commit.cached_hash;
 }
\ No newline at end of file
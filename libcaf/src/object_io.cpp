@@ -19,8 +19,8 @@ void write_with_length(int fd, const std::string &data); // Helper function to w
 void save_tree_record(int fd, const TreeRecord &record); // Helper function to serialize a TreeRecord
 TreeRecord load_tree_record(int fd); // Helper function to deserialize a TreeRecord
 
-// Serialize Commit to disk
-void save_commit(const std::string &root_dir, const Commit &commit) {
+// Serialize Commit to disk and return its hash
+std::string save_commit(const std::string &root_dir, const Commit &commit) {
     std::string commit_hash = hash_object(commit);
 
     int fd = open_content_for_writing(root_dir, commit_hash);
@@ -47,6 +47,8 @@ void save_commit(const std::string &root_dir, const Commit &commit) {
         delete_content(root_dir, commit_hash);
         throw;
     }
+
+    return commit_hash;
 }
 
 // Deserialize Commit from disk
@@ -76,7 +78,8 @@ Commit load_commit(const std::string &root_dir, const std::string &commit_hash)
     return Commit(tree_hash, author, message, timestamp, parents);
 }
 
-void save_tree(const std::string &root_dir, const Tree &tree) {
+// Serialize Tree to disk and return its hash
+std::string save_tree(const std::string &root_dir, const Tree &tree) {
     std::string tree_hash = hash_object(tree);
 
     int fd = open_content_for_writing(root_dir, tree_hash);
@@ -96,6 +99,8 @@ void save_tree(const std::string &root_dir, const Tree &tree) {
         delete_content(root_dir, tree_hash);
         throw;
     }
+
+    return tree_hash;
 }
 
 Tree load_tree(const std::string &root_dir, const std::string &tree_hash) {
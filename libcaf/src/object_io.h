@@ -10,9 +10,9 @@
 #include "commit.h"
 #include "tree.h"
 
-void save_commit(const std::string &root_dir, const Commit &commit);
+std::string save_commit(const std::string &root_dir, const Commit &commit);
 Commit load_commit(const std::string &root_dir, const std::string &hash);
-void save_tree(const std::string &root_dir, const Tree &tree);
+std::string save_tree(const std::string &root_dir, const Tree &tree);
 Tree load_tree(const std::string &root_dir, const std::string &hash);
 
 
@@ -3,6 +3,7 @@
 
 #include <unordered_map>
 #include <map>
+#include <optional>
 #include <string>
 #include <utility>
 
@@ -14,6 +15,9 @@ public:
 
     explicit Tree(const std::unordered_map<std::string, TreeRecord>& input): records(input.begin(), input.end()) {}
 
+    // Hash memoized by hash_object; the records are const, so it can never go stale
+    mutable std::optional<std::string> cached_hash;
+
     std::map<std::string, TreeRecord>::const_iterator record(const std::string& key) const {
         return records.find(key);
     }
@@ -1,3 +1,4 @@
+import os
 from collections.abc import Callable
 from pathlib import Path
 from random import choice
@@ -5,6 +6,26 @@ from random import choice
 from libcaf.repository import Repository
 from pytest import CaptureFixture, FixtureRequest, TempPathFactory, fixture
 
+RAM_TEMP_ROOT = Path('/dev/shm')
+# A full run writes about 22 MB of temp data and pytest keeps the last 3 runs' directories, so only use
+# the tmpfs when it has clear room for that; Docker's default /dev/shm is just 64 MB
+RAM_TEMP_MIN_FREE_BYTES = 256 * 1024 * 1024
+
+
+def _ram_temp_root_has_room() -> bool:
+    if not (RAM_TEMP_ROOT.is_dir() and os.access(RAM_TEMP_ROOT, os.W_OK)):
+        return False
+    stats = os.statvfs(RAM_TEMP_ROOT)
+    return stats.f_bavail * stats.f_frsize >= RAM_TEMP_MIN_FREE_BYTES
+
+
+def pytest_configure() -> None:
+    # Keep test repositories on a RAM-backed tmpfs when one with enough free space is available,
+    # so the hot write/commit/diff paths never wait on disk. Without it (or when PYTEST_DEBUG_TEMPROOT
+    # or --basetemp is given explicitly) pytest falls back to tempfile.gettempdir().
+    if _ram_temp_root_has_room():
+        os.environ.setdefault('PYTEST_DEBUG_TEMPROOT', str(RAM_TEMP_ROOT))
+
 
 def _random_string(length: int) -> str:
     return ''.join([choice('abcdefghijklmnopqrstuvwxyz0123456789-_') for _ in range(length)])
@@ -1,29 +1,117 @@
-from collections.abc import Sequence
+import hashlib
+import os
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+from libcaf import Commit, Tree, TreeRecord, TreeRecordType
 from libcaf.diff import AddedDiff, Diff, ModifiedDiff, MovedFromDiff, MovedToDiff, RemovedDiff
+from libcaf.plumbing import open_content_for_writing, save_commit, save_tree
+from libcaf.repository import Repository
+
+# A directory layout: file names map to their content, directory names to nested layouts.
+type TreeSpec = Mapping[str, bytes | TreeSpec]
+
+
+def write_file(path: Path | str, data: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def write_files(dir_path: Path | str, pairs: Sequence[tuple[str, bytes]]) -> None:
+    """Write several files into one directory, resolving the directory path only once."""
+    dirfd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        for name, data in pairs:
+            fd = os.open(name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dirfd)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+    finally:
+        os.close(dirfd)
+
+
+def stage_working_dir(root: Path | str, spec: TreeSpec) -> None:
+    """Create the given layout under root, making each directory once and writing its files in one batch."""
+    stack: list[tuple[str, TreeSpec]] = [(str(root), spec)]
+
+    while stack:
+        dir_path, node = stack.pop()
+        os.makedirs(dir_path, exist_ok=True)
+
+        files: list[tuple[str, bytes]] = []
+        for name, value in node.items():
+            if isinstance(value, bytes):
+                files.append((name, value))
+            else:
+                stack.append((os.path.join(dir_path, name), value))
+
+        if files:
+            write_files(dir_path, files)
+
+
+def stage_tree(repo: Repository, spec: TreeSpec, message: str = 'Staged commit',
+               parents: Sequence[str] = ()) -> str:
+    """Save a commit of the given layout straight into the object store, bypassing the working dir and index."""
+    objects_dir = repo.objects_dir()
+
+    def save(node: TreeSpec) -> str:
+        records: dict[str, TreeRecord] = {}
+        for name, value in node.items():
+            if isinstance(value, bytes):
+                blob_hash = hashlib.sha1(value).hexdigest()
+                with open_content_for_writing(objects_dir, blob_hash) as f:
+                    f.write(value)
+                records[name] = TreeRecord(TreeRecordType.BLOB, blob_hash, name)
+            else:
+                records[name] = TreeRecord(TreeRecordType.TREE, save(value), name)
+
+        return save_tree(objects_dir, Tree(records))
+
+    commit = Commit(save(spec), 'Tester', message, 0, list(parents))
+    return save_commit(objects_dir, commit)
 
 
 def flatten_diffs(diffs: Sequence[Diff]) -> list[Diff]:
     out: list[Diff] = []
+    stack = list(reversed(diffs))
 
-    def walk(d: Diff) -> None:
+    # Children are pushed in reverse so the output keeps the recursive pre-order.
+    while stack:
+        d = stack.pop()
         out.append(d)
-        for c in d.children:
-            walk(c)
+        if d.children:
+            stack.extend(reversed(d.children))
 
-    for d in diffs:
-        walk(d)
     return out
 
+
+_BUCKETS: dict[type[Diff], int] = {AddedDiff: 0, ModifiedDiff: 1, MovedToDiff: 2, MovedFromDiff: 3, RemovedDiff: 4}
+
+
 def split_diffs_by_type(diffs: Sequence[Diff]) -> \
         tuple[list[AddedDiff],
         list[ModifiedDiff],
         list[MovedToDiff],
         list[MovedFromDiff],
         list[RemovedDiff]]:
-    added = [d for d in diffs if isinstance(d, AddedDiff)]
-    moved_to = [d for d in diffs if isinstance(d, MovedToDiff)]
-    moved_from = [d for d in diffs if isinstance(d, MovedFromDiff)]
-    removed = [d for d in diffs if isinstance(d, RemovedDiff)]
-    modified = [d for d in diffs if isinstance(d, ModifiedDiff)]
+    buckets: tuple[list[Diff], ...] = ([], [], [], [], [])
+    for d in diffs:
+        i = _BUCKETS.get(type(d))
+        if i is not None:
+            buckets[i].append(d)
+
+    return buckets  # type: ignore[return-value]
+
+
+def count_diffs_by_type(diffs: Sequence[Diff]) -> dict[type[Diff], int]:
+    counts = dict.fromkeys((AddedDiff, ModifiedDiff, MovedToDiff, MovedFromDiff, RemovedDiff), 0)
+    for d in diffs:
+        t = type(d)
+        if t in counts:
+            counts[t] += 1
 
-    return added, modified, moved_to, moved_from, removed
+    return counts
@@ -1,199 +1,205 @@
-from collections.abc import Sequence
+import os
+from collections.abc import Callable, Sequence
 from pathlib import Path
+from shutil import copytree
+from types import SimpleNamespace
 
-from libcaf.repository import (Repository)
+from pytest import TempPathFactory, fixture, mark
+
+from libcaf.repository import (HashRef, Repository)
 from libcaf.diff import (AddedDiff, Diff, ModifiedDiff, MovedFromDiff, MovedToDiff, RemovedDiff)
-from diff_test_utils import split_diffs_by_type, flatten_diffs
+from diff_test_utils import (count_diffs_by_type, flatten_diffs, split_diffs_by_type, stage_tree,
+                             stage_working_dir, write_file, write_files)
+
+Scenario = Callable[[Path], None]
+ScenarioBuilder = Callable[[Scenario, Scenario], SimpleNamespace]
+
+# Bucket names in the order split_diffs_by_type returns them.
+DIFF_KINDS = ('added', 'modified', 'moved_to', 'moved_from', 'removed')
+
+
+@fixture(scope='module', autouse=True)
+def _diff_classes_are_final() -> None:
+    # The assertions below compare exact types, which is only equivalent to isinstance while nothing subclasses them.
+    for cls in (AddedDiff, ModifiedDiff, MovedToDiff, MovedFromDiff, RemovedDiff):
+        assert not cls.__subclasses__(), f'{cls.__name__} has subclasses'
+
+
+def assert_diff_counts(diffs: Sequence[Diff], *, added: int = 0, modified: int = 0, moved_to: int = 0,
+                       moved_from: int = 0, removed: int = 0) -> \
+        tuple[list[AddedDiff], list[ModifiedDiff], list[MovedToDiff], list[MovedFromDiff], list[RemovedDiff]]:
+    # Check the counts in one pass first so a mismatch fails before any bucket list is built.
+    assert tuple(count_diffs_by_type(diffs).values()) == (added, modified, moved_to, moved_from, removed)
+    return split_diffs_by_type(diffs)
+
+
+@fixture(scope='class')
+def committed_repo(tmp_path_factory: TempPathFactory) -> tuple[Repository, str]:
+    repo = Repository(tmp_path_factory.mktemp('read_only_diffs', numbered=True))
+    repo.init()
+    write_file(os.path.join(str(repo.working_dir), 'file.txt'), b'Same content')
+
+    return repo, repo.commit_working_dir('Tester', 'Initial commit')
 
-def test_diff_head(temp_repo: Repository) -> None:
-    file_path = temp_repo.working_dir / 'file.txt'
-    file_path.write_text('Same content')
 
-    temp_repo.commit_working_dir('Tester', 'Initial commit')
-    diff_result = temp_repo.diff()
+class TestReadOnlyDiffs:
+    """Diffs against an unchanged repository. None of these tests write to the repository, so they share one."""
 
-    assert len(diff_result) == 0
+    def test_diff_head(self, committed_repo: tuple[Repository, str]) -> None:
+        repo, _ = committed_repo
 
+        assert len(repo.diff()) == 0
 
-def test_diff_identical_commits(temp_repo: Repository) -> None:
-    file_path = temp_repo.working_dir / 'file.txt'
-    file_path.write_text('Same content')
+    def test_diff_identical_commits(self, committed_repo: tuple[Repository, str]) -> None:
+        repo, commit_hash = committed_repo
 
-    commit_hash = temp_repo.commit_working_dir('Tester', 'Initial commit')
-    diff_result = temp_repo.diff(commit_hash, 'HEAD')
+        assert len(repo.diff(commit_hash, 'HEAD')) == 0
 
-    assert len(diff_result) == 0
+    def test_diff_commit_dir_no_changes(self, committed_repo: tuple[Repository, str]) -> None:
+        repo, commit_hash = committed_repo
+
+        assert len(repo.diff(commit_hash, repo.working_dir)) == 0
 
 
 def test_diff_added_file(temp_repo: Repository) -> None:
-    file1 = temp_repo.working_dir / 'file1.txt'
-    file1.write_text('Content 1')
+    wd = str(temp_repo.working_dir)
+    write_file(os.path.join(wd, 'file1.txt'), b'Content 1')
     commit1_hash = temp_repo.commit_working_dir('Tester', 'Initial commit')
 
-    file2 = temp_repo.working_dir / 'file2.txt'
-    file2.write_text('Content 2')
+    write_file(os.path.join(wd, 'file2.txt'), b'Content 2')
     temp_repo.commit_working_dir('Tester', 'Added file2')
 
     diff_result = temp_repo.diff(commit1_hash)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, added=1)
 
-    assert len(added) == 1
     assert added[0].record.name == 'file2.txt'
 
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-    assert len(modified) == 0
-
 
 def test_diff_removed_file(temp_repo: Repository) -> None:
-    file1 = temp_repo.working_dir / 'file.txt'
-    file1.write_text('Content')
+    file1 = os.path.join(str(temp_repo.working_dir), 'file.txt')
+    write_file(file1, b'Content')
     commit1_hash = temp_repo.commit_working_dir('Tester', 'File created')
 
-    file1.unlink()  # Delete the file.
+    os.unlink(file1)  # Delete the file.
     temp_repo.commit_working_dir('Tester', 'File deleted')
 
     diff_result = temp_repo.diff(commit1_hash)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(modified) == 0
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, removed=1)
 
-    assert len(removed) == 1
     assert removed[0].record.name == 'file.txt'
 
 
-def test_diff_modified_file(temp_repo: Repository) -> None:
-    file1 = temp_repo.working_dir / 'file.txt'
-    file1.write_text('Old content')
-    commit1 = temp_repo.commit_working_dir('Tester', 'Original commit')
+def _modified_file_setup(working_dir: Path) -> None:
+    write_file(os.path.join(str(working_dir), 'file.txt'), b'Old content')
 
-    file1.write_text('New content')
-    commit2 = temp_repo.commit_working_dir('Tester', 'Modified file')
 
-    diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
+def _modified_file_mutate(working_dir: Path) -> None:
+    write_file(os.path.join(str(working_dir), 'file.txt'), b'New content')
 
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
 
-    assert len(modified) == 1
-    assert modified[0].record.name == 'file.txt'
+def _two_dirs_setup(working_dir: Path) -> None:
+    stage_working_dir(working_dir, {'dir1': {'file_a.txt': b'A1'}, 'dir2': {'file_b.txt': b'B1'}})
 
 
-def test_diff_nested_directory(temp_repo: Repository) -> None:
-    subdir = temp_repo.working_dir / 'subdir'
-    subdir.mkdir()
-    nested_file = subdir / 'file.txt'
-    nested_file.write_text('Initial')
-    commit1 = temp_repo.commit_working_dir('Tester', 'Commit with subdir')
+def _move_file_a_to_dir2(working_dir: Path) -> None:
+    wd = str(working_dir)
+    os.rename(os.path.join(wd, 'dir1', 'file_a.txt'), os.path.join(wd, 'dir2', 'file_c.txt'))
 
-    nested_file.write_text('Modified')
-    commit2 = temp_repo.commit_working_dir('Tester', 'Modified nested file')
 
-    diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
+def _move_file_b_to_dir1(working_dir: Path) -> None:
+    wd = str(working_dir)
+    os.rename(os.path.join(wd, 'dir2', 'file_b.txt'), os.path.join(wd, 'dir1', 'file_c.txt'))
 
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
 
-    assert len(modified) == 1
-    assert modified[0].record.name == 'subdir'
-    assert len(modified[0].children) == 1
-    assert modified[0].children[0].record.name == 'file.txt'
+@fixture(scope='module')
+def two_commit_diff(tmp_path_factory: TempPathFactory) -> ScenarioBuilder:
+    """Build each (setup, mutate) scenario once per module and share its diff between tests.
 
+    The diff assertions are read-only, so the repository and its diff result can be safely reused.
+    The committed setup state is kept as a template and copied for every scenario built on the same setup."""
+    templates: dict[Scenario, tuple[Path, HashRef]] = {}
+    cache: dict[tuple[Scenario, Scenario], SimpleNamespace] = {}
 
-def test_diff_nested_trees(temp_repo: Repository) -> None:
-    dir1 = temp_repo.working_dir / 'dir1'
-    dir1.mkdir()
-    file_a = dir1 / 'file_a.txt'
-    file_a.write_text('A1')
+    def _initial_repo(setup: Scenario) -> tuple[Repository, HashRef]:
+        if setup not in templates:
+            template = Repository(tmp_path_factory.mktemp('diff_template', numbered=True))
+            template.init()
 
-    dir2 = temp_repo.working_dir / 'dir2'
-    dir2.mkdir()
-    file_b = dir2 / 'file_b.txt'
-    file_b.write_text('B1')
+            setup(template.working_dir)
+            templates[setup] = (template.working_dir, template.commit_working_dir('Tester', 'Initial commit'))
 
-    commit1 = temp_repo.commit_working_dir('Tester', 'Initial nested commit')
+        template_dir, commit1 = templates[setup]
+        repo = Repository(tmp_path_factory.mktemp('diff_scenario', numbered=True))
+        copytree(template_dir, repo.working_dir, dirs_exist_ok=True)
+        return repo, commit1
 
-    file_a.write_text('A2')
-    file_b.unlink()
-    file_c = dir2 / 'file_c.txt'
-    file_c.write_text('C1')
+    def _build(setup: Scenario, mutate: Scenario) -> SimpleNamespace:
+        key = (setup, mutate)
+        if key not in cache:
+            repo, commit1 = _initial_repo(setup)
 
-    commit2 = temp_repo.commit_working_dir('Tester', 'Updated nested commit')
+            mutate(repo.working_dir)
+            commit2 = repo.commit_working_dir('Tester', 'Updated commit')
 
-    diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
+            cache[key] = SimpleNamespace(repo=repo, diff_result=repo.diff(commit1, commit2))
 
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
+        return cache[key]
 
-    assert len(modified) == 2
+    return _build
 
-    assert modified[0].record.name == 'dir1'
-    assert len(modified[0].children) == 1
-    assert modified[0].children[0].record.name == 'file_a.txt'
-    assert isinstance(modified[0].children[0], ModifiedDiff)
 
-    assert modified[1].record.name == 'dir2'
-    assert len(modified[1].children) == 2
-    assert modified[1].children[0].record.name == 'file_b.txt'
-    assert isinstance(modified[1].children[0], RemovedDiff)
-    assert modified[1].children[1].record.name == 'file_c.txt'
-    assert isinstance(modified[1].children[1], AddedDiff)
+def test_diff_modified_file(two_commit_diff: ScenarioBuilder) -> None:
+    diff_result = two_commit_diff(_modified_file_setup, _modified_file_mutate).diff_result
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1)
 
+    assert modified[0].record.name == 'file.txt'
 
-def test_diff_moved_file_added_first(temp_repo: Repository) -> None:
-    dir1 = temp_repo.working_dir / 'dir1'
-    dir1.mkdir()
-    file_a = dir1 / 'file_a.txt'
-    file_a.write_text('A1')
 
-    dir2 = temp_repo.working_dir / 'dir2'
-    dir2.mkdir()
-    file_b = dir2 / 'file_b.txt'
-    file_b.write_text('B1')
+def test_diff_nested_directory(temp_repo: Repository) -> None:
+    commit1 = stage_tree(temp_repo, {'subdir': {'file.txt': b'Initial'}})
+    commit2 = stage_tree(temp_repo, {'subdir': {'file.txt': b'Modified'}}, parents=[commit1])
 
-    commit1 = temp_repo.commit_working_dir('Tester', 'Initial nested commit')
+    diff_result = temp_repo.diff(commit1, commit2)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1)
+
+    assert modified[0].record.name == 'subdir'
+    assert len(modified[0].children) == 1
+    assert modified[0].children[0].record.name == 'file.txt'
 
-    file_a.rename(dir2 / 'file_c.txt')
 
-    commit2 = temp_repo.commit_working_dir('Tester', 'Updated nested commit')
+def test_diff_nested_trees(temp_repo: Repository) -> None:
+    commit1 = stage_tree(temp_repo, {'dir1': {'file_a.txt': b'A1'}, 'dir2': {'file_b.txt': b'B1'}})
+    commit2 = stage_tree(temp_repo, {'dir1': {'file_a.txt': b'A2'}, 'dir2': {'file_c.txt': b'C1'}},
+                         parents=[commit1])
 
     diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=2)
+
+    assert modified[0].record.name == 'dir1'
+    assert len(modified[0].children) == 1
+    assert modified[0].children[0].record.name == 'file_a.txt'
+    assert type(modified[0].children[0]) is ModifiedDiff
+
+    assert modified[1].record.name == 'dir2'
+    assert len(modified[1].children) == 2
+    assert modified[1].children[0].record.name == 'file_b.txt'
+    assert type(modified[1].children[0]) is RemovedDiff
+    assert modified[1].children[1].record.name == 'file_c.txt'
+    assert type(modified[1].children[1]) is AddedDiff
 
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
 
-    assert len(modified) == 2
+def test_diff_moved_file_added_first(two_commit_diff: ScenarioBuilder) -> None:
+    diff_result = two_commit_diff(_two_dirs_setup, _move_file_a_to_dir2).diff_result
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=2)
 
     assert modified[0].record.name == 'dir1'
     assert len(modified[0].children) == 1
 
     modified_child = modified[0].children[0]
-    assert isinstance(modified_child, MovedToDiff)
+    assert type(modified_child) is MovedToDiff
     assert modified_child.record.name == 'file_a.txt'
 
-    assert isinstance(modified_child.moved_to, MovedFromDiff)
+    assert type(modified_child.moved_to) is MovedFromDiff
     assert modified_child.moved_to.parent is not None
     assert modified_child.moved_to.parent.record.name == 'dir2'
     assert len(modified_child.moved_to.parent.children) == 1
@@ -203,52 +209,28 @@ def test_diff_moved_file_added_first(temp_repo: Repository) -> None:
     assert len(modified[1].children) == 1
 
     modified_child = modified[1].children[0]
-    assert isinstance(modified_child, MovedFromDiff)
+    assert type(modified_child) is MovedFromDiff
     assert modified_child.record.name == 'file_c.txt'
 
-    assert isinstance(modified_child.moved_from, MovedToDiff)
+    assert type(modified_child.moved_from) is MovedToDiff
     assert modified_child.moved_from.parent is not None
     assert modified_child.moved_from.parent.record.name == 'dir1'
     assert len(modified_child.moved_from.parent.children) == 1
     assert modified_child.moved_from.record.name == 'file_a.txt'
 
 
-def test_diff_moved_file_removed_first(temp_repo: Repository) -> None:
-    dir1 = temp_repo.working_dir / 'dir1'
-    dir1.mkdir()
-    file_a = dir1 / 'file_a.txt'
-    file_a.write_text('A1')
-
-    dir2 = temp_repo.working_dir / 'dir2'
-    dir2.mkdir()
-    file_b = dir2 / 'file_b.txt'
-    file_b.write_text('B1')
-
-    commit1 = temp_repo.commit_working_dir('Tester', 'Initial nested commit')
-
-    file_b.rename(dir1 / 'file_c.txt')
-
-    commit2 = temp_repo.commit_working_dir('Tester', 'Updated nested commit')
-
-    diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-
-    assert len(modified) == 2
+def test_diff_moved_file_removed_first(two_commit_diff: ScenarioBuilder) -> None:
+    diff_result = two_commit_diff(_two_dirs_setup, _move_file_b_to_dir1).diff_result
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=2)
 
     assert modified[0].record.name == 'dir1'
     assert len(modified[0].children) == 1
 
     modified_child = modified[0].children[0]
-    assert isinstance(modified_child, MovedFromDiff)
+    assert type(modified_child) is MovedFromDiff
     assert modified_child.record.name == 'file_c.txt'
 
-    assert isinstance(modified_child.moved_from, MovedToDiff)
+    assert type(modified_child.moved_from) is MovedToDiff
     assert modified_child.moved_from.parent is not None
     assert modified_child.moved_from.parent.record.name == 'dir2'
     assert len(modified_child.moved_from.parent.children) == 1
@@ -258,273 +240,206 @@ def test_diff_moved_file_removed_first(temp_repo: Repository) -> None:
     assert len(modified[1].children) == 1
 
     modified_child = modified[1].children[0]
-    assert isinstance(modified_child, MovedToDiff)
+    assert type(modified_child) is MovedToDiff
     assert modified_child.record.name == 'file_b.txt'
 
-    assert isinstance(modified_child.moved_to, MovedFromDiff)
+    assert type(modified_child.moved_to) is MovedFromDiff
     assert modified_child.moved_to.parent is not None
     assert len(modified_child.moved_to.parent.children) == 1
     assert modified_child.moved_to.parent.record.name == 'dir1'
     assert modified_child.moved_to.record.name == 'file_c.txt'
 
-def test_diff_commit_dir_no_changes(temp_repo: Repository) -> None:
-    file_path = temp_repo.working_dir / 'file.txt'
-    file_path.write_text('Same content')
+def _add_b(wd: str) -> None:
+    write_file(os.path.join(wd, 'b.txt'), b'B')
 
-    commit_hash = temp_repo.commit_working_dir('Tester', 'Initial commit')
 
-    diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    assert len(diff_result) == 0
-    
-def test_diff_commit_dir_added_file(temp_repo: Repository) -> None:
-    (temp_repo.working_dir / 'a.txt').write_text('A')
-    commit_hash = temp_repo.commit_working_dir('Tester', 'Commit A')
+def _remove_a(wd: str) -> None:
+    os.unlink(os.path.join(wd, 'a.txt'))
 
-    (temp_repo.working_dir / 'b.txt').write_text('B')
 
-    diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
-
-    assert len(added) == 1
-    assert added[0].record.name == 'b.txt'
-    assert len(modified) == 0
-    assert len(removed) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    
-def test_diff_commit_dir_removed_file(temp_repo: Repository) -> None:
-    (temp_repo.working_dir / 'a.txt').write_text('A')
-    commit_hash = temp_repo.commit_working_dir('Tester', 'Commit A')
-
-    (temp_repo.working_dir / 'a.txt').unlink()
-
-    diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+def _modify_a(wd: str) -> None:
+    write_file(os.path.join(wd, 'a.txt'), b'New')
 
-    assert len(removed) == 1
-    assert removed[0].record.name == 'a.txt'
-    assert len(added) == 0
-    assert len(modified) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
 
-def test_diff_commit_dir_modified_file(temp_repo: Repository) -> None:
-    (temp_repo.working_dir / 'a.txt').write_text('Old')
-    commit_hash = temp_repo.commit_working_dir('Tester', 'Commit old')
+@mark.parametrize(('mutate', 'expected'), [
+    (_add_b, {'added': ['b.txt']}),
+    (_remove_a, {'removed': ['a.txt']}),
+    (_modify_a, {'modified': ['a.txt']}),
+], ids=['added_file', 'removed_file', 'modified_file'])
+def test_diff_commit_dir(temp_repo: Repository, mutate: Callable[[str], None],
+                         expected: dict[str, list[str]]) -> None:
+    wd = str(temp_repo.working_dir)
+    write_file(os.path.join(wd, 'a.txt'), b'A')
+    commit_hash = temp_repo.commit_working_dir('Tester', 'Commit A')
 
-    (temp_repo.working_dir / 'a.txt').write_text('New')
+    mutate(wd)
 
     diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    buckets = assert_diff_counts(diff_result, **{kind: len(names) for kind, names in expected.items()})
+
+    for kind, bucket in zip(DIFF_KINDS, buckets, strict=True):
+        assert [d.record.name for d in bucket] == expected.get(kind, [])
 
-    assert len(modified) == 1
-    assert modified[0].record.name == 'a.txt'
-    assert len(added) == 0
-    assert len(removed) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
 
 def test_diff_commit_dir_nested_changes(temp_repo: Repository) -> None:
     subdir = temp_repo.working_dir / 'subdir'
-    subdir.mkdir()
-    (subdir / 'file.txt').write_text('Initial')
+    stage_working_dir(temp_repo.working_dir, {'subdir': {'file.txt': b'Initial'}})
     commit_hash = temp_repo.commit_working_dir('Tester', 'Commit nested')
 
-    (subdir / 'file.txt').write_text('Modified')
-    (subdir / 'new.txt').write_text('New file')
+    write_files(subdir, [('file.txt', b'Modified'), ('new.txt', b'New file')])
 
     diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1)
 
     # Expect the directory to be modified, with children diffs
-    assert len(modified) == 1
     assert modified[0].record.name == 'subdir'
 
-    child_types = [type(c) for c in modified[0].children]
-    child_names = [c.record.name for c in modified[0].children]
-
-    assert 'file.txt' in child_names
-    assert 'new.txt' in child_names
-    assert any(isinstance(c, ModifiedDiff) and c.record.name == 'file.txt' for c in modified[0].children)
-    assert any(isinstance(c, AddedDiff) and c.record.name == 'new.txt' for c in modified[0].children)
+    pairs = {(type(c), c.record.name) for c in modified[0].children}
+    assert (ModifiedDiff, 'file.txt') in pairs
+    assert (AddedDiff, 'new.txt') in pairs
 
 def test_diff_commit_dir_ignores_repo_dir(temp_repo: Repository) -> None:
-    (temp_repo.working_dir / 'a.txt').write_text('A')
+    write_file(os.path.join(str(temp_repo.working_dir), 'a.txt'), b'A')
     commit_hash = temp_repo.commit_working_dir('Tester', 'Commit A')
 
     # Create internal file inside .caf
-    internal = temp_repo.repo_path() / 'INTERNAL.txt'
-    internal.write_text('ignore me')
+    write_file(os.path.join(str(temp_repo.repo_path()), 'INTERNAL.txt'), b'ignore me')
 
     diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    flat = flatten_diffs(diff_result)
 
-    assert not any(d.record.name == 'INTERNAL.txt' for d in flat)
+    names = {d.record.name for d in flatten_diffs(diff_result)}
+    assert 'INTERNAL.txt' not in names
 
 def test_diff_path_vs_path_detects_changes(temp_repo: Repository) -> None:
     dir1 = temp_repo.working_dir / 'dir1_any'
     dir2 = temp_repo.working_dir / 'dir2_any'
-    dir1.mkdir()
-    dir2.mkdir()
-
-    # Same filename, different content => Modified
-    (dir1 / 'same.txt').write_text('v1')
-    (dir2 / 'same.txt').write_text('v2')
-
-    # Present only in dir1 => Removed
-    (dir1 / 'only1.txt').write_text('only in 1')
-
-    # Present only in dir2 => Added
-    (dir2 / 'only2.txt').write_text('only in 2')
+    stage_working_dir(temp_repo.working_dir, {
+        # Same filename, different content => Modified
+        # Present only in dir1 => Removed
+        'dir1_any': {'same.txt': b'v1', 'only1.txt': b'only in 1'},
+        # Present only in dir2 => Added
+        'dir2_any': {'same.txt': b'v2', 'only2.txt': b'only in 2'},
+    })
 
     diffs = temp_repo.diff(dir1, dir2)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diffs)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diffs, added=1, modified=1, removed=1)
 
     assert [d.record.name for d in added] == ['only2.txt']
     assert [d.record.name for d in removed] == ['only1.txt']
     assert [d.record.name for d in modified] == ['same.txt']
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
 
 def test_diff_fs_vs_commit_reversed(temp_repo: Repository) -> None:
     # 1. Setup Commit A with file.txt = "v1"
-    file_path = temp_repo.working_dir / 'file.txt'
-    file_path.write_text('v1')
+    wd = str(temp_repo.working_dir)
+    file_path = os.path.join(wd, 'file.txt')
+    write_file(file_path, b'v1')
     commit_hash = temp_repo.commit_working_dir('Tester', 'Commit v1')
 
     # 2. Modify file.txt to "v2" and create new.txt in Working Directory
-    file_path.write_text('v2')
-    (temp_repo.working_dir / 'new.txt').write_text('new content')
+    write_file(file_path, b'v2')
+    write_file(os.path.join(wd, 'new.txt'), b'new content')
 
     # 3. Diff Working Directory -> Commit
     # Note: Logic is "How to transform Spec1 (WD) into Spec2 (Commit)"
     diff_result = temp_repo.diff(temp_repo.working_dir, commit_hash)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1, removed=1)
 
     # Expect 'new.txt' to be REMOVED (it exists in WD, but not in Commit)
-    assert len(removed) == 1
     assert removed[0].record.name == 'new.txt'
 
     # Expect 'file.txt' to be MODIFIED (v2 -> v1)
-    assert len(modified) == 1
+    # and no additions (nothing in Commit that isn't in WD, except the content change)
     assert modified[0].record.name == 'file.txt'
 
-    # Ensure no additions (nothing in Commit that isn't in WD, except the content change)
-    assert len(added) == 0
-
 def test_diff_arbitrary_fs_dirs_modified(temp_repo: Repository) -> None:
     dir_a = temp_repo.working_dir / 'folder_a'
     dir_b = temp_repo.working_dir / 'folder_b'
-    dir_a.mkdir()
-    dir_b.mkdir()
-
-    # Same file, different content
-    (dir_a / 'common.txt').write_text('Content A')
-    (dir_b / 'common.txt').write_text('Content B')
-
-    # File only in A
-    (dir_a / 'only_a.txt').write_text('A')
-
-    # File only in B
-    (dir_b / 'only_b.txt').write_text('B')
+    # Same file, different content, plus one file only in each side
+    stage_working_dir(temp_repo.working_dir, {
+        'folder_a': {'common.txt': b'Content A', 'only_a.txt': b'A'},
+        'folder_b': {'common.txt': b'Content B', 'only_b.txt': b'B'},
+    })
 
     diff_result = temp_repo.diff(dir_a, dir_b)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, added=1, modified=1, removed=1)
 
-    assert len(modified) == 1
     assert modified[0].record.name == 'common.txt'
 
-    assert len(removed) == 1
     assert removed[0].record.name == 'only_a.txt'
 
-    assert len(added) == 1
     assert added[0].record.name == 'only_b.txt'
 
 def test_diff_arbitrary_fs_dirs_move_detection(temp_repo: Repository) -> None:
     dir_a = temp_repo.working_dir / 'start_state'
     dir_b = temp_repo.working_dir / 'end_state'
-    dir_a.mkdir()
-    dir_b.mkdir()
-
-    # Create content in A
-    (dir_a / 'original.txt').write_text('Moving Content')
-
-    # Create same content in B but renamed
-    (dir_b / 'renamed.txt').write_text('Moving Content')
+    stage_working_dir(temp_repo.working_dir, {
+        # Create content in A
+        'start_state': {'original.txt': b'Moving Content'},
+        # Create same content in B but renamed
+        'end_state': {'renamed.txt': b'Moving Content'},
+    })
 
     diff_result = temp_repo.diff(dir_a, dir_b)
     
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, moved_to=1, moved_from=1)
 
-    assert len(added) == 0
-    assert len(removed) == 0
-    
     # Corrected Assertions:
     
     # 1. MovedToDiff represents the OLD file (the source)
-    assert len(moved_to) == 1
     assert moved_to[0].record.name == 'original.txt'  # Was 'renamed.txt'
     
     # It points to the NEW file
-    assert isinstance(moved_to[0].moved_to, MovedFromDiff)
+    assert type(moved_to[0].moved_to) is MovedFromDiff
     assert moved_to[0].moved_to.record.name == 'renamed.txt'
 
     # 2. MovedFromDiff represents the NEW file (the destination)
-    assert len(moved_from) == 1
     assert moved_from[0].record.name == 'renamed.txt' # Was 'original.txt'
     
     # It points back to the OLD file
-    assert isinstance(moved_from[0].moved_from, MovedToDiff)
+    assert type(moved_from[0].moved_from) is MovedToDiff
     # Note: Depending on recursion/linking, the parent might be None or populated, 
     # but the record name should definitively be the source.
     assert moved_from[0].moved_from.record.name == 'original.txt'
 
 def test_diff_commit_vs_fs_deep_nested_changes(temp_repo: Repository) -> None:
     # Setup complex directory structure
-    src = temp_repo.working_dir / 'src'
-    src.mkdir()
-    utils = src / 'utils'
-    utils.mkdir()
+    src = os.path.join(str(temp_repo.working_dir), 'src')
+    os.makedirs(os.path.join(src, 'utils'))
     
-    (utils / 'helper.py').write_text('print("help")')
-    (src / 'main.py').write_text('print("main")')
+    helper = os.path.join(src, 'utils', 'helper.py')
+    write_file(helper, b'print("help")')
+    write_file(os.path.join(src, 'main.py'), b'print("main")')
     
     commit_hash = temp_repo.commit_working_dir('Tester', 'Structure')
 
     # Modify deep file in FS
-    (utils / 'helper.py').write_text('print("help v2")')
+    write_file(helper, b'print("help v2")')
     
     # Diff Commit -> FS
     diff_result = temp_repo.diff(commit_hash, temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1)
 
     # Top level should be 'src' (Modified)
-    assert len(modified) == 1
     assert modified[0].record.name == 'src'
     
     # Inside src, 'utils' should be Modified
     src_children = modified[0].children
     utils_diff = next(c for c in src_children if c.record.name == 'utils')
-    assert isinstance(utils_diff, ModifiedDiff)
+    assert type(utils_diff) is ModifiedDiff
     
     # Inside utils, 'helper.py' should be Modified
     utils_children = utils_diff.children
     helper_diff = next(c for c in utils_children if c.record.name == 'helper.py')
-    assert isinstance(helper_diff, ModifiedDiff)
+    assert type(helper_diff) is ModifiedDiff
 
 def test_diff_absolute_paths(temp_repo: Repository) -> None:
     abs_dir_1 = (temp_repo.working_dir / 'abs_1').resolve()
     abs_dir_2 = (temp_repo.working_dir / 'abs_2').resolve()
     
-    abs_dir_1.mkdir()
-    abs_dir_2.mkdir()
-    
-    (abs_dir_1 / 'test.txt').write_text('A')
-    (abs_dir_2 / 'test.txt').write_text('B')
+    stage_working_dir(temp_repo.working_dir, {'abs_1': {'test.txt': b'A'}, 'abs_2': {'test.txt': b'B'}})
     
     # Pass string representation of absolute paths
     diff_result = temp_repo.diff(str(abs_dir_1), str(abs_dir_2))
     
-    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diff_result)
-    assert len(modified) == 1
+    added, modified, moved_to, moved_from, removed = assert_diff_counts(diff_result, modified=1)
     assert modified[0].record.name == 'test.txt'
\ No newline at end of file
@@ -1,3 +1,7 @@
+import hashlib
+from collections.abc import Callable
+from pathlib import Path
+
 from libcaf.constants import HASH_LENGTH
 from libcaf.plumbing import hash_file, hash_object
 from pytest import raises
@@ -10,6 +14,15 @@ def test_hash_file_non_existent_file() -> None:
         hash_file('test_hash_file_non_existent_file.txt')
 
 
+def test_hash_file_small_and_large_files_match_sha1(
+        temp_content_file_factory: Callable[..., tuple[Path, bytes]]) -> None:
+    # The large file crosses the size from which hash_file maps the file instead of reading it
+    for length in (100, 3 * 1024 * 1024 + 7):
+        file, content = temp_content_file_factory(content=bytes(range(256)) * (length // 256) + b'tail')
+
+        assert hash_file(file) == hashlib.sha1(content).hexdigest()
+
+
 def test_commit_hash() -> None:
     commit = Commit('1234567890abcdef', 'Author', 'Initial commit', 1234567890, ['3234567890abcdef'])
     commit_hash = hash_object(commit)
@@ -114,3 +127,15 @@ def test_different_hashes_for_different_parent_commits_one_none() -> None:
 
     # Verify the hashes are different
     assert hash1 != hash2, 'Hashes for commits with different parent hashes one none should not match'
+
+
+def test_repeated_hash_object_calls_agree_with_fresh_objects() -> None:
+    commit = Commit('1234567890abcdef', 'Author', 'Initial commit', 1234567890, ['3234567890abcdef'])
+    tree = Tree({'record': TreeRecord(TreeRecordType.BLOB, 'abcdef1234567890', 'record')})
+
+    assert hash_object(commit) == hash_object(commit)
+    assert hash_object(commit) == hash_object(Commit('1234567890abcdef', 'Author', 'Initial commit', 1234567890,
+                                                     ['3234567890abcdef']))
+    assert hash_object(tree) == hash_object(tree)
+    assert hash_object(tree) == hash_object(Tree({'record': TreeRecord(TreeRecordType.BLOB, 'abcdef1234567890',
+                                                                       'record')}))
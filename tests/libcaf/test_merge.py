@@ -1,71 +1,80 @@
 from libcaf.repository import Repository
-from libcaf import Commit
-from libcaf.plumbing import save_commit, hash_object
 from libcaf.ref import HashRef
-import libcaf.index
-from datetime import datetime
-from libcaf.merge import merge_content, FileLineSequence
-
-# Helper to create a commit immediately
-def create_commit(repo: Repository, parents: list[str], message: str) -> str:
-    # create a file to ensure different tree hash if needed, or just reusing empty tree is fine
-    # but to be safe and "real", let's update index with a file
-    filename = f"file_{message}.txt"
-    filepath = repo.working_dir / filename
-    filepath.write_text(f"content for {message}")
-    
-    # Equivalent to "git add" - using the public repository API
-    repo.update_index(filepath)
-    
-    # write the tree from index
-    index_data = repo.read_index()
-    tree_hash = libcaf.index.build_tree_from_index(index_data, repo.objects_dir())
-    
-    commit = Commit(tree_hash, "User", message, int(datetime.now().timestamp()), parents)
-    save_commit(repo.objects_dir(), commit)
-    return hash_object(commit)
-
-def test_merge_base_linear(temp_repo: Repository) -> None:
-    # A -> B -> C
-    hash_a = create_commit(temp_repo, [], "A")
-    hash_b = create_commit(temp_repo, [hash_a], "B")
-    hash_c = create_commit(temp_repo, [hash_b], "C")
+from libcaf.merge import merge_content, merge_content_str, FileLineSequence, MyersSequenceMatcher
+from random import Random
+from types import SimpleNamespace
+
+from diff_test_utils import stage_tree
+from pytest import TempPathFactory, fixture
+
+# Helper to create a commit immediately. merge_base only looks at topology, so the commit is
+# written straight into the object store with a single file unique to it.
+def _fast_unique_commit(repo: Repository, parents: list[str], message: str) -> str:
+    return stage_tree(repo, {f"file_{message}.txt": f"content for {message}".encode()}, message, parents)
+
+@fixture(scope='module')
+def commit_graph(tmp_path_factory: TempPathFactory) -> SimpleNamespace:
+    # merge_base never writes to the repository, so every topology test reads this one graph:
+    #
+    # A -> B -> D
+    # |         ^
+    # +--> C ---+
+    #      |
+    #      +--> X
+    #
+    # D is a merge with first parent B; C is only reachable from D through its second parent.
+    repo = Repository(working_dir=tmp_path_factory.mktemp('merge_base_repo'))
+    repo.init()
+
+    hash_a = _fast_unique_commit(repo, [], "A")
+    hash_b = _fast_unique_commit(repo, [hash_a], "B")
+    hash_c = _fast_unique_commit(repo, [hash_a], "C")
+    hash_d = _fast_unique_commit(repo, [hash_b, hash_c], "D")
+    hash_x = _fast_unique_commit(repo, [hash_c], "X")
+
+    return SimpleNamespace(repo=repo, a=hash_a, b=hash_b, c=hash_c, d=hash_d, x=hash_x)
+
+def test_merge_base_linear(commit_graph: SimpleNamespace) -> None:
+    # A -> B -> D along first parents
+    g = commit_graph
     
-    assert temp_repo.merge_base(hash_a, hash_c) == hash_a
-    assert temp_repo.merge_base(hash_b, hash_c) == hash_b
-    assert temp_repo.merge_base(hash_a, hash_b) == hash_a
-    assert temp_repo.merge_base(hash_b, hash_a) == hash_a
+    assert g.repo.merge_base(g.a, g.d) == g.a
+    assert g.repo.merge_base(g.b, g.d) == g.b
+    assert g.repo.merge_base(g.a, g.b) == g.a
+    assert g.repo.merge_base(g.b, g.a) == g.a
 
-def test_merge_base_branching(temp_repo: Repository) -> None:
+def test_merge_base_branching(commit_graph: SimpleNamespace) -> None:
     # A -> B
     # |
     # +--> C
-    hash_a = create_commit(temp_repo, [], "A")
-    hash_b = create_commit(temp_repo, [hash_a], "B")
-    hash_c = create_commit(temp_repo, [hash_a], "C")
+    g = commit_graph
     
-    assert temp_repo.merge_base(hash_b, hash_c) == hash_a
-    assert temp_repo.merge_base(hash_c, hash_b) == hash_a
+    assert g.repo.merge_base(g.b, g.c) == g.a
+    assert g.repo.merge_base(g.c, g.b) == g.a
 
-def test_merge_base_diamond(temp_repo: Repository) -> None:
+def test_merge_base_diamond(commit_graph: SimpleNamespace) -> None:
     # A -> B -> D
     # |    
     # +--> C -> D
     # 
     # Merge base of B and C is A.
-    hash_a = create_commit(temp_repo, [], "A")
-    hash_b = create_commit(temp_repo, [hash_a], "B")
-    hash_c = create_commit(temp_repo, [hash_a], "C")
-    hash_d = create_commit(temp_repo, [hash_b, hash_c], "D")
+    g = commit_graph
     
     # merge_base(B, C) should be A
-    assert temp_repo.merge_base(hash_b, hash_c) == hash_a
+    assert g.repo.merge_base(g.b, g.c) == g.a
     
     # merge_base(D, A) should be A
-    assert temp_repo.merge_base(hash_d, hash_a) == hash_a
+    assert g.repo.merge_base(g.d, g.a) == g.a
     
     # merge_base(D, B) should be B
-    assert temp_repo.merge_base(hash_d, hash_b) == hash_b
+    assert g.repo.merge_base(g.d, g.b) == g.b
+
+def test_merge_base_follows_second_parents(commit_graph: SimpleNamespace) -> None:
+    g = commit_graph
+
+    assert g.repo.merge_base(g.d, g.x) == g.c
+    assert g.repo.merge_base(g.x, g.d) == g.c
+    assert g.repo.merge_base(g.d, g.c) == g.c
 
 def merge_content_helper(base_content: str, source_content: str, other_content: str, tmp_path) -> str:
     base = tmp_path / "base"
@@ -74,7 +83,7 @@ def merge_content_helper(base_content: str, source_content: str, other_content:
     base.write_text(base_content)
     source.write_text(source_content)
     other.write_text(other_content)
-    return "".join(merge_content(base, source, other))
+    return merge_content_str(base, source, other)
 
 def test_merge_content_no_changes(tmp_path):
     base = "line1\nline2\n"
@@ -132,18 +141,53 @@ def test_merge_content_large_file(tmp_path):
     # Create a large file (> 2 pages, assuming 4KB pages, so > 8KB)
     # 10,000 lines of "line X\n" will be roughly 70-80KB
     num_lines = 10000
-    base_content = "".join([f"line {i}\n" for i in range(num_lines)])
+    lines = [f"line {i}\n" for i in range(num_lines)]
+    first_modified = "line 0 modified\n"
+    last_modified = f"line {num_lines-1} modified\n"
+    base_content = "".join(lines)
     
     # Introduce a change at end and beginning
-    source_content = base_content.replace("line 0\n", "line 0 modified\n")
-    other_content = base_content.replace(f"line {num_lines-1}\n", f"line {num_lines-1} modified\n")
+    source_content = "".join([first_modified, *lines[1:]])
+    other_content = "".join([*lines[:-1], last_modified])
     
     # Expected result should have both changes (no conflict)
-    expected_content = source_content.replace(f"line {num_lines-1}\n", f"line {num_lines-1} modified\n")
+    expected_content = "".join([first_modified, *lines[1:-1], last_modified])
     
     merged = merge_content_helper(base_content, source_content, other_content, tmp_path)
     assert merged == expected_content
 
+def test_merge_content_keeps_lines_shared_by_all_versions_as_anchors(tmp_path):
+    # The trailing "b, c, d" is common to all three versions, but the source's match of it is what
+    # shows the source only dropped a leading "b", clear of the other side's insertion of "y"
+    base = "b\nb\nc\nd\n"
+    source = "b\nc\nd\n"
+    other = "y\nb\nb\nc\nd\n"
+    assert merge_content_helper(base, source, other, tmp_path) == "y\nb\nc\nd\n"
+
+def test_merge_content_conflict_markers_use_crlf_of_source(tmp_path):
+    base = tmp_path / "base"
+    source = tmp_path / "source"
+    other = tmp_path / "other"
+    base.write_bytes(b"h\r\nm\r\nt\r\n")
+    source.write_bytes(b"h\r\nt\r\n")
+    other.write_bytes(b"h\r\ny\r\nt\r\n")
+
+    merged = b"".join(merge_content(base, source, other))
+
+    assert merged == b"h\r\n<<<<<<< source\r\n=======\r\ny\r\n>>>>>>> other\r\nt\r\n"
+
+def test_merge_content_keeps_undecodable_bytes(tmp_path):
+    base = tmp_path / "base"
+    source = tmp_path / "source"
+    other = tmp_path / "other"
+    base.write_bytes(b"\xff first\nsecond\nkept\n\xfe third\n")
+    source.write_bytes(b"\xff first\nsecond source\nkept\n\xfe third\n")
+    other.write_bytes(b"\xff first\nsecond\nkept\n\xfe third other\n")
+
+    merged = b"".join(merge_content(base, source, other))
+
+    assert merged == b"\xff first\nsecond source\nkept\n\xfe third other\n"
+
 def test_merge_content_empty_files(tmp_path):
     # Case 1: All empty
     assert merge_content_helper("", "", "", tmp_path) == ""
@@ -165,12 +209,12 @@ def test_file_line_sequence_basic(tmp_path):
     with FileLineSequence(f) as seq:
         assert len(seq) == 3
         # Direct access
-        assert seq[0] == "line1\n"
-        assert seq[1] == "line2\n"
-        assert seq[2] == "line3"
+        assert seq[0] == b"line1\n"
+        assert seq[1] == b"line2\n"
+        assert seq[2] == b"line3"
         # Negative indexing
-        assert seq[-1] == "line3"
-        assert seq[-2] == "line2\n"
+        assert seq[-1] == b"line3"
+        assert seq[-2] == b"line2\n"
 
 
 
@@ -184,7 +228,7 @@ def test_file_line_sequence_context_manager(tmp_path):
 
         with seq as s:
             assert s is seq
-            assert s[0] == "foo\n"
+            assert s[0] == b"foo\n"
     finally:
         # Ensure it is closed if test fails inside block
         pass
@@ -207,7 +251,7 @@ def test_file_line_sequence_lazy_slicing(tmp_path):
         
         # 2. Slice [0:2] should only scan up to 2
         slice_res = seq[0:2]
-        assert slice_res == ["line0\n", "line1\n"]
+        assert slice_res == [b"line0\n", b"line1\n"]
         assert seq._is_fully_scanned is False
         assert len(seq._offsets) >= 3 # 0, len(l0), len(l0+l1)
 # Verify lazy loading: Ensure we didn't scan too far ahead.
@@ -224,3 +268,42 @@ def test_file_line_sequence_lazy_slicing(tmp_path):
         assert seq._is_fully_scanned is True
         assert len(seq) == 10
 
+
+def _lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev_diag = 0
+        for j, y in enumerate(b):
+            prev_diag, row[j + 1] = row[j + 1], prev_diag + 1 if x == y else max(row[j], row[j + 1])
+    return row[-1]
+
+def test_myers_matching_blocks_form_a_longest_common_subsequence():
+    rng = Random(0)
+    for _ in range(500):
+        a = [rng.choice('abc') for _ in range(rng.randint(0, 12))]
+        b = [rng.choice('abc') for _ in range(rng.randint(0, 12))]
+
+        blocks = MyersSequenceMatcher(None, a, b).get_matching_blocks()
+
+        assert blocks[-1] == (len(a), len(b), 0)
+        next_i = next_j = 0
+        for i, j, n in blocks[:-1]:
+            assert n > 0 and i >= next_i and j >= next_j
+            assert a[i:i + n] == b[j:j + n]
+            next_i, next_j = i + n, j + n
+        assert sum(n for _, _, n in blocks) == _lcs_length(a, b)
+
+def test_merge_content_conflict_between_shared_prefix_and_suffix(tmp_path):
+    shared_head = "".join(f"head {i}\n" for i in range(50))
+    shared_tail = "".join(f"tail {i}\n" for i in range(50))
+    base = shared_head + "middle\n" + shared_tail
+    source = shared_head + "middle source\n" + shared_tail
+    other = shared_head + "middle other\n" + shared_tail
+    expected = shared_head + "<<<<<<< source\nmiddle source\n=======\nmiddle other\n>>>>>>> other\n" + shared_tail
+    assert merge_content_helper(base, source, other, tmp_path) == expected
+
+def test_merge_base_unrelated_histories(temp_repo: Repository) -> None:
+    hash_a = _fast_unique_commit(temp_repo, [], "A")
+    hash_b = _fast_unique_commit(temp_repo, [], "B")
+
+    assert temp_repo.merge_base(hash_a, hash_b) is None
@@ -9,7 +9,7 @@ def test_save_load_commit(temp_repo_dir: Path) -> None:
     commit = Commit('tree_hash123', 'Author', 'Commit message', 1234567890, ['commithash123parent'])
     commit_hash = hash_object(commit)
 
-    save_commit(temp_repo_dir, commit)
+    assert save_commit(temp_repo_dir, commit) == commit_hash
     loaded_commit = load_commit(temp_repo_dir, commit_hash)
 
     assert loaded_commit.tree_hash == commit.tree_hash
@@ -42,7 +42,7 @@ def test_save_load_tree(temp_repo_dir: Path) -> None:
     tree = Tree(records)
     tree_hash = hash_object(tree)
 
-    save_tree(temp_repo_dir, tree)
+    assert save_tree(temp_repo_dir, tree) == tree_hash
     loaded_tree = load_tree(temp_repo_dir, tree_hash)
 
     assert loaded_tree.records.keys() == records.keys()
@@ -1,6 +1,8 @@
+import time
 from pathlib import Path
 from shutil import rmtree
 
+import libcaf.repository
 from libcaf.constants import DEFAULT_BRANCH, HASH_LENGTH
 from libcaf.plumbing import hash_object, load_commit, load_tree
 from libcaf.ref import RefError, SymRef
@@ -96,6 +98,50 @@ def test_save_dir(temp_repo: Repository) -> None:
     assert (objects_dir / tree_ref[:2] / tree_ref).exists()
 
 
+def test_save_file_content_reuses_hash_of_unchanged_file(temp_repo: Repository, monkeypatch) -> None:
+    temp_file = temp_repo.working_dir / 'settled.txt'
+    temp_file.write_text('settled content')
+    blob_hash = temp_repo.save_file_content(temp_file).hash
+
+    # Pretend the file was last changed long ago, so its hash may be remembered by stat
+    time_ns = time.time_ns
+    monkeypatch.setattr(time, 'time_ns', lambda: time_ns() + 10**12)
+    saves = []
+    save_file_content = libcaf.repository.save_file_content
+    monkeypatch.setattr(libcaf.repository, 'save_file_content',
+                        lambda objects_dir, file: saves.append(file) or save_file_content(objects_dir, file))
+
+    assert temp_repo.save_file_content(temp_file).hash == blob_hash
+    assert temp_repo.save_file_content(temp_file).hash == blob_hash
+    assert len(saves) == 1
+
+    # A deleted object is saved again
+    (temp_repo.objects_dir() / blob_hash[:2] / blob_hash).unlink()
+    assert temp_repo.save_file_content(temp_file).hash == blob_hash
+    assert (temp_repo.objects_dir() / blob_hash[:2] / blob_hash).exists()
+    assert len(saves) == 2
+
+    # Changed content is hashed again
+    temp_file.write_text('changed content')
+    assert temp_repo.save_file_content(temp_file).hash != blob_hash
+    assert len(saves) == 3
+
+
+def test_save_file_content_hash_cache_is_bounded(temp_repo: Repository, monkeypatch) -> None:
+    time_ns = time.time_ns
+    monkeypatch.setattr(time, 'time_ns', lambda: time_ns() + 10**12)
+    monkeypatch.setattr(libcaf.repository, 'FILE_HASH_CACHE_SIZE', 2)
+
+    files = [temp_repo.working_dir / f'file{i}.txt' for i in range(3)]
+    for i, file in enumerate(files):
+        file.write_text(f'content {i}')
+        temp_repo.save_file_content(file)
+
+    # The least recently used file was evicted
+    assert len(temp_repo._file_hash_cache) == 2
+    assert set(temp_repo._file_hash_cache.values()) == {temp_repo.save_file_content(file).hash for file in files[1:]}
+
+
 def test_head_log(temp_repo: Repository) -> None:
     temp_file = temp_repo.working_dir / 'commit_test.txt'
 
@@ -359,3 +405,59 @@ def test_head_commit_with_symbolic_ref_returns_hash_ref(temp_repo: Repository) -
     temp_repo.update_ref('heads/main', commit_ref)
 
     assert temp_repo.head_commit() == commit_ref
+
+
+def test_log_reuses_cached_commit_objects(temp_repo: Repository) -> None:
+    (temp_repo.working_dir / 'test_file.txt').write_text('Test content')
+    temp_repo.commit_working_dir('Author', 'Test commit')
+
+    first = next(temp_repo.log()).commit
+    second = next(temp_repo.log()).commit
+
+    assert first is second
+
+
+def test_disabled_object_cache_reloads_commit_objects(temp_repo: Repository) -> None:
+    (temp_repo.working_dir / 'test_file.txt').write_text('Test content')
+    temp_repo.commit_working_dir('Author', 'Test commit')
+    temp_repo.set_object_cache_size(0)
+
+    first = next(temp_repo.log()).commit
+    second = next(temp_repo.log()).commit
+
+    assert first is not second
+    assert first.tree_hash == second.tree_hash
+
+
+def test_merge_base_reuses_cached_commit_objects(temp_repo: Repository) -> None:
+    (temp_repo.working_dir / 'test_file.txt').write_text('Base')
+    base_ref = temp_repo.commit_working_dir('Author', 'Base')
+    (temp_repo.working_dir / 'test_file.txt').write_text('Tip')
+    tip_ref = temp_repo.commit_working_dir('Author', 'Tip')
+
+    assert temp_repo.merge_base(tip_ref, base_ref) == base_ref
+
+    objects_dir = temp_repo.objects_dir()
+    for commit_ref in (base_ref, tip_ref):
+        (objects_dir / commit_ref[:2] / commit_ref).unlink()
+
+    assert temp_repo.merge_base(tip_ref, base_ref) == base_ref
+
+
+def test_commit_rebuilds_tree_when_cached_tree_object_is_missing(temp_repo: Repository) -> None:
+    (temp_repo.working_dir / 'test_file.txt').write_text('Test content')
+    commit_ref1 = temp_repo.commit_working_dir('Author', 'First commit')
+
+    objects_dir = temp_repo.objects_dir()
+    tree_hash = load_commit(objects_dir, commit_ref1).tree_hash
+    (objects_dir / tree_hash[:2] / tree_hash).unlink()
+
+    commit_ref2 = temp_repo.commit_working_dir('Author', 'Second commit')
+
+    assert load_commit(objects_dir, commit_ref2).tree_hash == tree_hash
+    assert (objects_dir / tree_hash[:2] / tree_hash).exists()
+
+
+def test_diff_identical_invalid_specs_raise_error(temp_repo: Repository) -> None:
+    with raises(RepositoryError):
+        temp_repo.diff('no_such_ref', 'no_such_ref')
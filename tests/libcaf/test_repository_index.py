@@ -1,3 +1,6 @@
+import os
+
+import libcaf.index
 from pytest import raises
 from libcaf.repository import Repository
 
@@ -110,6 +113,19 @@ def test_remove_non_existent_is_safe(temp_repo: Repository) -> None:
     
     assert temp_repo.read_index() == {}
 
+
+def test_remove_non_indexed_path_leaves_index_files_untouched(temp_repo: Repository) -> None:
+    """Test that removing a path that is not in the index writes neither the index nor its journal."""
+    (temp_repo.working_dir / 'kept.txt').write_text("kept")
+    temp_repo.update_index('kept.txt')
+    journal_path = libcaf.index.index_journal_path(temp_repo.index_path())
+    before = journal_path.read_bytes()
+
+    temp_repo.remove_from_index('ghost.txt')
+
+    assert journal_path.read_bytes() == before
+    assert temp_repo.read_index() == {'kept.txt': _get_hash(temp_repo, 'kept.txt')}
+
 def test_nested_directory_paths(temp_repo: Repository) -> None:
     """Test that files in subdirectories are correctly normalized and stored in the index."""
     subdir = temp_repo.working_dir / 'subdir'
@@ -195,3 +211,222 @@ def test_index_update_idempotency_with_multiple_files(temp_repo: Repository) ->
     # and read_index logic parses line by line from a sorted file)
     keys = list(index.keys())
     assert keys == ['file1.txt', 'file2.txt']
+
+
+def test_update_index_many_merges_into_existing_index(temp_repo: Repository) -> None:
+    """Test that a batch update interleaves new, updated and unchanged entries in sorted order."""
+    for name in ('b.txt', 'd.txt'):
+        (temp_repo.working_dir / name).write_text(name)
+    temp_repo.update_index_many(['d.txt', 'b.txt'])
+
+    (temp_repo.working_dir / 'a.txt').write_text("new a")
+    (temp_repo.working_dir / 'd.txt').write_text("new d")
+    (temp_repo.working_dir / 'e.txt').write_text("new e")
+    temp_repo.update_index_many(['e.txt', 'a.txt', 'd.txt'])
+
+    index = temp_repo.read_index()
+    assert list(index) == ['a.txt', 'b.txt', 'd.txt', 'e.txt']
+    assert index == {name: _get_hash(temp_repo, name) for name in index}
+
+
+def test_update_index_many_stores_files_concurrently(temp_repo: Repository) -> None:
+    """Test that a batch hashed across threads records every file, including ones with identical content."""
+    names = [f'dir/file{i:02}.txt' for i in range(40)]
+    (temp_repo.working_dir / 'dir').mkdir()
+    for i, name in enumerate(names):
+        (temp_repo.working_dir / name).write_text(f'content {i % 5}')
+
+    temp_repo.update_index_many(names)
+
+    index = temp_repo.read_index()
+    assert list(index) == names
+    assert index == {name: _get_hash(temp_repo, name) for name in names}
+    for blob_hash in set(index.values()):
+        assert (temp_repo.objects_dir() / blob_hash[:2] / blob_hash).exists()
+
+
+def test_update_index_many_rejects_repo_dir_before_writing(temp_repo: Repository) -> None:
+    """Test that an invalid path in a batch leaves the index untouched."""
+    (temp_repo.working_dir / 'file.txt').write_text("content")
+
+    with raises(ValueError):
+        temp_repo.update_index_many(['file.txt', temp_repo.repo_dir / 'HEAD'])
+
+    assert temp_repo.read_index() == {}
+
+
+def test_read_index_skips_blank_and_malformed_lines(temp_repo: Repository) -> None:
+    """Test that read_index keeps valid entries around blank, malformed and CRLF-terminated lines."""
+    temp_repo.index_path().write_bytes(b'a.txt 111\r\n\nmalformed\nmy file.txt 222\nlast.txt 333')
+
+    assert temp_repo.read_index() == {'a.txt': '111', 'my file.txt': '222', 'last.txt': '333'}
+
+
+def test_read_empty_index_file(temp_repo: Repository) -> None:
+    """Test that an existing but empty index file reads as an empty index."""
+    temp_repo.index_path().write_bytes(b'')
+
+    assert temp_repo.read_index() == {}
+
+
+def test_read_index_reuses_parsed_entries_until_the_file_changes(temp_repo: Repository, monkeypatch) -> None:
+    """Test that an unchanged, settled index file is parsed only once."""
+    index_path = temp_repo.index_path()
+    index_path.write_text('a.txt 111\n')
+    os.utime(index_path, ns=(1_000_000_000, 1_000_000_000))
+
+    parses = []
+    read_index = libcaf.index.read_index
+    monkeypatch.setattr(libcaf.index, 'read_index', lambda path: parses.append(path) or read_index(path))
+
+    assert temp_repo.read_index() == {'a.txt': '111'}
+    assert temp_repo.read_index() == {'a.txt': '111'}
+    assert len(parses) == 1
+
+    # Same size, new modification time: the file is parsed again
+    index_path.write_text('b.txt 222\n')
+    assert temp_repo.read_index() == {'b.txt': '222'}
+    assert len(parses) == 2
+
+    # The repository's own writes drop the cached entries
+    os.utime(index_path, ns=(1_000_000_000, 1_000_000_000))
+    temp_repo.read_index()
+    (temp_repo.working_dir / 'c.txt').write_text("c")
+    temp_repo.update_index('c.txt')
+    assert 'c.txt' in temp_repo.read_index()
+
+
+def test_update_index_skips_unchanged_entries_of_a_settled_index(temp_repo: Repository) -> None:
+    """Test that re-adding unchanged files writes nothing once the index is cached, while changes are recorded."""
+    for name in ('a.txt', 'b.txt'):
+        (temp_repo.working_dir / name).write_text(name)
+    temp_repo.update_index_many(['a.txt', 'b.txt'])
+
+    journal_path = libcaf.index.index_journal_path(temp_repo.index_path())
+    os.utime(journal_path, ns=(1_000_000_000, 1_000_000_000))
+    temp_repo.read_index()
+    before = journal_path.read_bytes()
+
+    temp_repo.update_index('a.txt')
+    temp_repo.update_index_many(['a.txt', 'b.txt'])
+    assert journal_path.read_bytes() == before
+
+    os.utime(journal_path, ns=(1_000_000_000, 1_000_000_000))
+    temp_repo.read_index()
+    (temp_repo.working_dir / 'b.txt').write_text("changed b")
+    temp_repo.update_index_many(['a.txt', 'b.txt'])
+
+    assert journal_path.read_bytes() == before + f'b.txt {_get_hash(temp_repo, "b.txt")}\n'.encode()
+
+
+def test_lookup_index_matches_read_index(temp_repo: Repository) -> None:
+    """Test that single-entry lookups agree with the fully parsed index, including journaled updates."""
+    names = ['a.txt', 'dir/b.txt', 'dir/sub dir/c.txt', 'z.txt', 'ü.txt']
+    (temp_repo.working_dir / 'dir' / 'sub dir').mkdir(parents=True)
+    for name in names:
+        (temp_repo.working_dir / name).write_text(name)
+    temp_repo.update_index_many(names)
+    libcaf.index.compact_index(temp_repo.index_path())
+
+    (temp_repo.working_dir / 'z.txt').write_text("changed z")
+    temp_repo.update_index('z.txt')
+    temp_repo.remove_from_index('a.txt')
+
+    index_path = temp_repo.index_path()
+    entries = temp_repo.read_index()
+    for name in names + ['dir', 'dir/a.txt', 'm.txt', '0.txt', '~.txt']:
+        assert libcaf.index.lookup_index(index_path, name) == entries.get(name)
+
+
+def test_read_index_rereads_when_compacted_between_index_and_journal(temp_repo: Repository, monkeypatch) -> None:
+    """Test that a compaction and a new update landing between the two reads do not lose compacted entries."""
+    index_path = temp_repo.index_path()
+    libcaf.index.merge_index('a.txt', '111', index_path)
+
+    read_journal = libcaf.index._read_journal
+    interleaved = []
+    def compact_then_read(journal_path):
+        if not interleaved:
+            interleaved.append(journal_path)
+            libcaf.index.compact_index(index_path)
+            libcaf.index.merge_index('b.txt', '222', index_path)
+        return read_journal(journal_path)
+    monkeypatch.setattr(libcaf.index, '_read_journal', compact_then_read)
+
+    assert libcaf.index.read_index(index_path) == {'a.txt': '111', 'b.txt': '222'}
+
+
+def test_remove_from_index_with_blank_line(temp_repo: Repository) -> None:
+    """Test that an entry is found and removed when blank lines sit between the index entries."""
+    temp_repo.index_path().write_bytes(b'a.txt 111\n\nz.txt 222\n')
+
+    assert libcaf.index.lookup_index(temp_repo.index_path(), 'a.txt') == '111'
+    temp_repo.remove_from_index('a.txt')
+
+    assert temp_repo.read_index() == {'z.txt': '222'}
+
+
+def test_index_updates_are_journaled_until_compacted(temp_repo: Repository) -> None:
+    """Test that updates append to the journal, and compaction folds it into the index file."""
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        (temp_repo.working_dir / name).write_text(name)
+    temp_repo.update_index_many(['c.txt', 'a.txt'])
+    temp_repo.update_index('b.txt')
+    temp_repo.remove_from_index('c.txt')
+
+    index_path = temp_repo.index_path()
+    journal_path = libcaf.index.index_journal_path(index_path)
+    assert not index_path.exists()
+    assert journal_path.read_text().splitlines()[-1] == 'c.txt -'
+
+    expected = {'a.txt': _get_hash(temp_repo, 'a.txt'), 'b.txt': _get_hash(temp_repo, 'b.txt')}
+    assert temp_repo.read_index() == expected
+    assert list(temp_repo.read_index()) == ['a.txt', 'b.txt']
+
+    libcaf.index.compact_index(index_path)
+
+    assert not journal_path.exists()
+    assert index_path.read_text() == ''.join(f'{path} {hash_}\n' for path, hash_ in expected.items())
+    assert temp_repo.read_index() == expected
+
+
+def test_index_journal_is_compacted_once_larger_than_the_index(temp_repo: Repository, monkeypatch) -> None:
+    """Test that an update compacts the journal when it outgrows the index file."""
+    monkeypatch.setattr(libcaf.index, 'INDEX_JOURNAL_COMPACT_MIN_BYTES', 0)
+    (temp_repo.working_dir / 'file.txt').write_text('content')
+
+    temp_repo.update_index('file.txt')
+
+    assert not libcaf.index.index_journal_path(temp_repo.index_path()).exists()
+    assert temp_repo.read_index() == {'file.txt': _get_hash(temp_repo, 'file.txt')}
+
+
+def test_read_index_ignores_incomplete_journal_record(temp_repo: Repository) -> None:
+    """Test that a journal record without its trailing newline is not applied."""
+    temp_repo.index_path().write_text('a.txt 111\n')
+    libcaf.index.index_journal_path(temp_repo.index_path()).write_text('b.txt 222\na.txt -')
+
+    assert temp_repo.read_index() == {'a.txt': '111', 'b.txt': '222'}
+
+
+def test_append_after_incomplete_journal_record(temp_repo: Repository) -> None:
+    """Test that an append drops a torn journal record instead of continuing its line."""
+    index_path = temp_repo.index_path()
+    journal_path = libcaf.index.index_journal_path(index_path)
+    journal_path.write_text('a.txt 111\nb.txt 2222222222')
+
+    libcaf.index.merge_index_many({'c.txt': '333'}, index_path)
+
+    assert journal_path.read_text() == 'a.txt 111\nc.txt 333\n'
+    assert temp_repo.read_index() == {'a.txt': '111', 'c.txt': '333'}
+
+
+def test_append_after_torn_record_longer_than_a_tail_block(temp_repo: Repository) -> None:
+    """Test that the last complete record is found even when the torn tail spans several reads."""
+    index_path = temp_repo.index_path()
+    journal_path = libcaf.index.index_journal_path(index_path)
+    journal_path.write_text('a.txt 111\n' + 'x' * 10_000)
+
+    libcaf.index.merge_index_many({'c.txt': '333'}, index_path)
+
+    assert journal_path.read_text() == 'a.txt 111\nc.txt 333\n'